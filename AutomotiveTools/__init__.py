@@ -10,9 +10,1537 @@ bl_info = {
     "github_url": "https://github.com/CarlMarkswx/AutomotiveTools_for_blender/",
 }
 import bpy
+import os
 import re
+import io
+import json
+import time
+import pstats
+import cProfile
+import hashlib
+import functools
 import bmesh
+import numpy as np
+from mathutils import Matrix
 from collections import defaultdict
+from bpy_extras.io_utils import ExportHelper
+
+try:
+    import psutil
+except ImportError:  # 可选依赖，仅用于批处理会话的内存统计
+    psutil = None
+
+# ---------------------- 批量数组工具 ----------------------
+# 属性数据类型 -> (foreach 字段名, 分量数, NumPy 类型)
+ATTRIBUTE_LAYOUT = {
+    'FLOAT': ("value", 1, np.float32),
+    'INT': ("value", 1, np.int32),
+    'INT8': ("value", 1, np.int32),
+    'BOOLEAN': ("value", 1, np.bool_),
+    'FLOAT2': ("vector", 2, np.float32),
+    'FLOAT_VECTOR': ("vector", 3, np.float32),
+    'INT16_2D': ("value", 2, np.int32),
+    'INT32_2D': ("value", 2, np.int32),
+    'FLOAT_COLOR': ("color", 4, np.float32),
+    'BYTE_COLOR': ("color", 4, np.float32),
+    'QUATERNION': ("value", 4, np.float32),
+    'FLOAT4X4': ("value", 16, np.float32),
+}
+# 由合并逻辑单独处理（需要变换或重映射）的属性，不走通用复制
+SKIPPED_ATTRIBUTES = {"position", "material_index", "custom_normal"}
+
+def read_array(collection, prop, count, dtype):
+    """用 foreach_get 将集合属性读入一维 NumPy 数组"""
+    arr = np.empty(count, dtype=dtype)
+    if count:
+        collection.foreach_get(prop, arr)
+    return arr
+
+def mesh_domain_sizes(me):
+    """返回网格各属性域的元素数量"""
+    return {
+        'POINT': len(me.vertices),
+        'EDGE': len(me.edges),
+        'FACE': len(me.polygons),
+        'CORNER': len(me.loops),
+    }
+
+def copyable_attributes(me):
+    """列出可按数组直接复制的通用属性 (name, domain, data_type)"""
+    return [(attr.name, attr.domain, attr.data_type) for attr in me.attributes
+            if attr.name not in SKIPPED_ATTRIBUTES
+            and not attr.name.startswith(".")  # 内部属性（选择/隐藏/拓扑）
+            and attr.data_type in ATTRIBUTE_LAYOUT]
+
+def write_mesh_topology(me, co, edge_verts, loop_verts, loop_edges, loop_starts, material_index):
+    """把顶点/边/循环/面数组一次性写入空网格（面由 loop_start 偏移量定义）"""
+    me.vertices.add(len(co))
+    me.vertices.foreach_set("co", np.ascontiguousarray(co, dtype=np.float32).ravel())
+    me.edges.add(len(edge_verts) // 2)
+    me.edges.foreach_set("vertices", edge_verts)
+    me.loops.add(len(loop_verts))
+    me.loops.foreach_set("vertex_index", loop_verts)
+    me.loops.foreach_set("edge_index", loop_edges)
+    me.polygons.add(len(loop_starts))
+    me.polygons.foreach_set("loop_start", loop_starts)
+    me.polygons.foreach_set("material_index", material_index)
+
+def read_attributes(me):
+    """读取所有可复制的通用属性，返回 name -> (domain, data_type, 二维数组)"""
+    sizes = mesh_domain_sizes(me)
+    result = {}
+    for name, domain, data_type in copyable_attributes(me):
+        field, width, dtype = ATTRIBUTE_LAYOUT[data_type]
+        values = read_array(me.attributes[name].data, field, sizes[domain] * width, dtype)
+        result[name] = (domain, data_type, values.reshape(-1, width))
+    return result
+
+def write_attributes(me, attributes, domain_indices=None):
+    """写入 read_attributes 的结果；domain_indices 给出各域要保留的元素索引（为空则全部写入）"""
+    for name, (domain, data_type, values) in attributes.items():
+        field = ATTRIBUTE_LAYOUT[data_type][0]
+        if domain_indices is not None:
+            values = values[domain_indices[domain]]
+        layer = me.attributes.get(name) or me.attributes.new(name, data_type, domain)
+        layer.data.foreach_set(field, np.ascontiguousarray(values).ravel())
+
+def add_group_weights(vg, indices, weights):
+    """按权重值分桶写入顶点组，每个不同权重只调用一次 vg.add
+
+    一次排序完成分桶（O(n log n)），不对每个权重值重复扫描整个数组。
+    """
+    values, inverse = np.unique(weights, return_inverse=True)
+    order = np.argsort(inverse.ravel(), kind='stable')
+    buckets = np.split(indices[order], np.cumsum(np.bincount(inverse.ravel(), minlength=len(values)))[:-1])
+    for weight, bucket in zip(values.tolist(), buckets):
+        vg.add(bucket.tolist(), weight, 'REPLACE')
+
+# 部件 ID 面属性名与网格上的部件名表（JSON 字符串列表）自定义属性名
+PART_ATTRIBUTE = "at_part_id"
+PART_NAMES_PROPERTY = "at_part_names"
+
+def part_table(me):
+    """返回网格的 (部件 ID 数组, 部件名列表)；没有部件 ID 属性时返回 None"""
+    attr = me.attributes.get(PART_ATTRIBUTE)
+    names = me.get(PART_NAMES_PROPERTY)
+    if attr is None or attr.domain != 'FACE' or attr.data_type != 'INT' or names is None:
+        return None
+    names = json.loads(names)
+    ids = read_array(attr.data, "value", len(me.polygons), np.int32)
+    np.clip(ids, 0, max(len(names) - 1, 0), out=ids)
+    return ids, names
+
+def write_part_table(me, ids, names):
+    attr = me.attributes.get(PART_ATTRIBUTE) or me.attributes.new(PART_ATTRIBUTE, 'INT', 'FACE')
+    attr.data.foreach_set("value", np.ascontiguousarray(ids, dtype=np.int32))
+    me[PART_NAMES_PROPERTY] = json.dumps(names, ensure_ascii=False)
+
+def bulk_join_meshes(target, objects, part_groups=True, part_attribute=False):
+    """以数组方式把 objects 的网格合并进 target，不调用 bpy.ops.object.join
+
+    顶点、边、循环、面、材质索引、通用属性（UV/颜色/锐边等）与自定义法线均以
+    foreach_get/foreach_set 批量拼接；part_groups 为 True 时为每个源物体创建同名顶点组，
+    part_attribute 为 True 时改为写入一个整数面属性 at_part_id 及部件名表。
+    源网格已带部件表时沿用其部件划分。
+    """
+    objects = [target] + [obj for obj in objects if obj != target]
+    inv_target = np.array(target.matrix_world.inverted_safe(), dtype=np.float64)
+
+    # 1. 统计各域偏移量，建立材质重映射和属性并集
+    totals = dict.fromkeys(('POINT', 'EDGE', 'FACE', 'CORNER'), 0)
+    materials = []
+    material_lookup = {}
+    attr_specs = {}
+    entries = []
+    for obj in objects:
+        me = obj.data
+        sizes = mesh_domain_sizes(me)
+        offsets = dict(totals)
+        for domain, count in sizes.items():
+            totals[domain] += count
+        remap = []
+        for slot in obj.material_slots:
+            if slot.material not in material_lookup:
+                material_lookup[slot.material] = len(materials)
+                materials.append(slot.material)
+            remap.append(material_lookup[slot.material])
+        for spec in copyable_attributes(me):
+            if spec[0] != PART_ATTRIBUTE:
+                attr_specs.setdefault(spec[0], spec)
+        entries.append((obj, me, sizes, offsets, np.array(remap or [0], dtype=np.int32)))
+
+    # 2. 拼接拓扑数组（顶点坐标变换到 target 局部空间）
+    co = np.empty((totals['POINT'], 3), dtype=np.float32)
+    edge_verts = np.empty(totals['EDGE'] * 2, dtype=np.int32)
+    loop_verts = np.empty(totals['CORNER'], dtype=np.int32)
+    loop_edges = np.empty(totals['CORNER'], dtype=np.int32)
+    loop_starts = np.empty(totals['FACE'], dtype=np.int32)
+    mat_indices = np.empty(totals['FACE'], dtype=np.int32)
+    keep_normals = any(me.has_custom_normals for _, me, _, _, _ in entries)
+    normals = np.empty((totals['CORNER'], 3), dtype=np.float32) if keep_normals else None
+    for obj, me, sizes, offsets, remap in entries:
+        v0, e0, f0, l0 = offsets['POINT'], offsets['EDGE'], offsets['FACE'], offsets['CORNER']
+        nv, ne, nf, nl = sizes['POINT'], sizes['EDGE'], sizes['FACE'], sizes['CORNER']
+        matrix = inv_target @ np.array(obj.matrix_world, dtype=np.float64)
+        local_co = read_array(me.vertices, "co", nv * 3, np.float32).reshape(-1, 3)
+        co[v0:v0 + nv] = local_co @ matrix[:3, :3].T + matrix[:3, 3]
+        edge_verts[e0 * 2:(e0 + ne) * 2] = read_array(me.edges, "vertices", ne * 2, np.int32) + v0
+        loop_verts[l0:l0 + nl] = read_array(me.loops, "vertex_index", nl, np.int32) + v0
+        loop_edges[l0:l0 + nl] = read_array(me.loops, "edge_index", nl, np.int32) + e0
+        loop_starts[f0:f0 + nf] = read_array(me.polygons, "loop_start", nf, np.int32) + l0
+        local_mi = read_array(me.polygons, "material_index", nf, np.int32)
+        mat_indices[f0:f0 + nf] = remap[np.clip(local_mi, 0, len(remap) - 1)]
+        if normals is not None:
+            corner = read_array(me.corner_normals, "vector", nl * 3, np.float32).reshape(-1, 3)
+            corner = corner @ np.linalg.pinv(matrix[:3, :3])  # 法线使用逆转置矩阵
+            corner /= np.maximum(np.linalg.norm(corner, axis=1, keepdims=True), 1e-12)
+            normals[l0:l0 + nl] = corner
+
+    # 3. 一次性写入新网格
+    new_me = bpy.data.meshes.new(target.data.name)
+    write_mesh_topology(new_me, co, edge_verts, loop_verts, loop_edges, loop_starts, mat_indices)
+    for mat in materials:
+        new_me.materials.append(mat)
+
+    for name, domain, data_type in attr_specs.values():
+        field, width, dtype = ATTRIBUTE_LAYOUT[data_type]
+        values = np.zeros(totals[domain] * width, dtype=dtype)
+        for obj, me, sizes, offsets, remap in entries:
+            attr = me.attributes.get(name)
+            if attr is None or attr.domain != domain or attr.data_type != data_type:
+                continue
+            start = offsets[domain] * width
+            count = sizes[domain] * width
+            values[start:start + count] = read_array(attr.data, field, count, dtype)
+        layer = new_me.attributes.get(name) or new_me.attributes.new(name, data_type, domain)
+        layer.data.foreach_set(field, values)
+    # 部件 ID：每个源物体一个 ID，已合并过的源网格按其部件表展开
+    part_names = []
+    part_ids = np.empty(totals['FACE'], dtype=np.int32)
+    nested = False
+    for obj, me, sizes, offsets, remap in entries:
+        f0, nf = offsets['FACE'], sizes['FACE']
+        table = part_table(me)
+        if table is None:
+            part_ids[f0:f0 + nf] = len(part_names)
+            part_names.append(obj.name)
+        else:
+            part_ids[f0:f0 + nf] = table[0] + len(part_names)
+            part_names.extend(table[1])
+            nested = True
+    if part_attribute or nested:
+        write_part_table(new_me, part_ids, part_names)
+    active_uv = target.data.uv_layers.active
+    if active_uv and active_uv.name in new_me.uv_layers:
+        new_me.uv_layers.active = new_me.uv_layers[active_uv.name]
+
+    new_me.update()
+    if normals is not None:
+        new_me.normals_split_custom_set(normals)
+
+    # 4. 从缓存的归属表收集原有顶点组权重（仅处理带顶点组的物体）
+    weights = defaultdict(lambda: ([], []))
+    part_ranges = []
+    for obj, me, sizes, offsets, remap in entries:
+        v0 = offsets['POINT']
+        part_ranges.append((obj.name, v0, sizes['POINT']))
+        if not obj.vertex_groups:
+            continue
+        names = [vg.name for vg in obj.vertex_groups]
+        # 写入新网格的权重必须来自最新数据，不使用缓存
+        vert_idx, group_idx, group_weights = vertex_group_index(obj, rebuild=True)
+        for group in np.unique(group_idx[group_idx < len(names)]).tolist():
+            mask = group_idx == group
+            indices, values = weights[names[group]]
+            indices.append(vert_idx[mask] + v0)
+            values.append(group_weights[mask])
+
+    # 5. 替换 target 的网格，删除其余物体及孤立网格
+    mesh_name = target.data.name
+    old_meshes = {me for _, me, _, _, _ in entries}
+    bpy.data.batch_remove(objects[1:])
+    target.data = new_me
+    for slot, mat in zip(target.material_slots, materials):
+        if slot.link == 'OBJECT':
+            slot.material = mat
+    bpy.data.batch_remove([me for me in old_meshes if me.users == 0])
+    new_me.name = mesh_name
+
+    # 6. 按权重分桶写回顶点组，每桶一次 vg.add
+    for name, (indices, values) in weights.items():
+        vg = target.vertex_groups.get(name) or target.vertex_groups.new(name=name)
+        add_group_weights(vg, np.concatenate(indices), np.concatenate(values))
+    if part_groups:
+        for name, start, count in part_ranges:
+            vg = target.vertex_groups.new(name=name)
+            vg.add(range(start, start + count), 1.0, 'REPLACE')
+
+    return {'objects': len(objects), 'vertices': totals['POINT'], 'faces': totals['FACE']}
+
+def material_user_index():
+    """单次扫描所有数据块与物体插槽，返回 材质 -> [(拥有者, 插槽索引, 'DATA'|'OBJECT')]"""
+    index = defaultdict(list)
+    # 网格/曲线等数据块上的材质列表（包括未被任何物体使用的数据块）
+    datablocks = set(bpy.data.meshes)
+    datablocks.update(obj.data for obj in bpy.data.objects
+                      if obj.data is not None and hasattr(obj.data, "materials"))
+    for data in datablocks:
+        for i, mat in enumerate(data.materials):
+            if mat is not None:
+                index[mat].append((data, i, 'DATA'))
+    # 物体级链接的插槽
+    for obj in bpy.data.objects:
+        for i, slot in enumerate(obj.material_slots):
+            if slot.link == 'OBJECT' and slot.material is not None:
+                index[slot.material].append((obj, i, 'OBJECT'))
+    return index
+
+def apply_material_remap(remap, index=None, record_undo=None):
+    """按 {旧材质: 新材质} 重映射表一次性替换引用，返回各类替换数量
+
+    record_undo(func, *args) 用于登记撤销动作（分块执行取消时恢复原材质）。
+    """
+    if index is None:
+        index = material_user_index()
+    stats = {'data': 0, 'object': 0}
+    for old_mat, new_mat in remap.items():
+        for owner, i, kind in index.get(old_mat, ()):
+            if kind == 'DATA':
+                if record_undo:
+                    record_undo(owner.materials.__setitem__, i, old_mat)
+                owner.materials[i] = new_mat
+                stats['data'] += 1
+            else:
+                slot = owner.material_slots[i]
+                if record_undo:
+                    record_undo(setattr, slot, "material", old_mat)
+                slot.material = new_mat
+                stats['object'] += 1
+    return stats
+
+def batch_remove_ids(ids, data_collection):
+    """批量删除数据块，返回删除数量；批量删除失败时逐个删除并跳过无法删除的项"""
+    ids = [data for data in ids if data is not None]
+    try:
+        bpy.data.batch_remove(ids)
+    except Exception:
+        removed = 0
+        for data in ids:
+            try:
+                data_collection.remove(data)
+                removed += 1
+            except Exception:
+                pass
+        return removed
+    return len(ids)
+
+def find_empty_collections(root):
+    """后序遍历计算每个集合的子树是否为空（按集合记忆化，每个集合只计算一次）
+
+    返回所有空集合（不含 root）。被多个父级链接的集合只计算一次，其空与否与父级无关。
+    """
+    is_empty = {}
+    stack = [(root, False)]
+    while stack:
+        collection, expanded = stack.pop()
+        if collection in is_empty:
+            continue
+        if not expanded:
+            stack.append((collection, True))
+            stack.extend((child, False) for child in collection.children if child not in is_empty)
+        else:
+            is_empty[collection] = (not collection.objects and
+                                    all(is_empty[child] for child in collection.children))
+    return [collection for collection, empty in is_empty.items() if empty and collection != root]
+
+def cleanup_empty_collections(root):
+    """删除 root 下所有空 Collection（一次批量删除），返回删除数量"""
+    return batch_remove_ids(find_empty_collections(root), bpy.data.collections)
+
+# 材质内容哈希缓存：material.session_uid -> (快速签名, 哈希)，编辑后由 depsgraph 回调失效
+material_hash_cache = {}
+# 节点基类自带的属性（名称、位置、标签等）与内容无关，不参与哈希
+NODE_BASE_PROPERTIES = {prop.identifier for prop in bpy.types.Node.bl_rna.properties}
+# 参与哈希的材质级设置（不同 Blender 版本缺失的属性按 None 处理）
+MATERIAL_HASH_SETTINGS = (
+    "use_nodes", "diffuse_color", "metallic", "roughness", "specular_intensity",
+    "blend_method", "surface_render_method", "use_backface_culling", "pass_index",
+)
+
+def canonical_value(value, memo):
+    """把属性或插槽值转换为稳定、可比较的规范形式"""
+    if isinstance(value, float):
+        return round(value, 6)
+    if value is None or isinstance(value, (bool, int, str)):
+        return value
+    if isinstance(value, (set, frozenset)):
+        return tuple(sorted(value))
+    if isinstance(value, bpy.types.Image):
+        path = bpy.path.abspath(value.filepath) if value.filepath else value.name
+        return ("IMAGE", path, value.source, value.colorspace_settings.name)
+    if isinstance(value, bpy.types.NodeTree):
+        return ("TREE", node_tree_hash(value, memo))
+    if isinstance(value, bpy.types.ID):
+        return (type(value).__name__, value.name)
+    try:
+        return tuple(canonical_value(v, memo) for v in value)
+    except TypeError:
+        return repr(value)
+
+def node_signature(node, memo):
+    """节点的内容签名：类型、设置、未连接输入的默认值（不含名称与位置）"""
+    items = [node.bl_idname, node.mute]
+    for prop in node.bl_rna.properties:
+        ident = prop.identifier
+        if ident in NODE_BASE_PROPERTIES or prop.type == 'COLLECTION':
+            continue
+        value = getattr(node, ident, None)
+        if prop.type == 'POINTER' and not isinstance(value, bpy.types.ID):
+            continue  # 颜色渐变、曲线等结构体单独处理
+        items.append((ident, canonical_value(value, memo)))
+    ramp = getattr(node, "color_ramp", None)
+    if ramp is not None:
+        items.append(("color_ramp", ramp.interpolation, ramp.color_mode,
+                      tuple((round(e.position, 6), canonical_value(e.color, memo)) for e in ramp.elements)))
+    mapping = getattr(node, "mapping", None)
+    if mapping is not None and hasattr(mapping, "curves"):
+        items.append(("mapping", tuple(tuple((canonical_value(p.location, memo), p.handle_type) for p in curve.points)
+                                       for curve in mapping.curves)))
+    for sock in node.inputs:
+        if not sock.is_linked and hasattr(sock, "default_value"):
+            items.append((sock.identifier, canonical_value(sock.default_value, memo)))
+    if node.bl_idname in {'ShaderNodeValue', 'ShaderNodeRGB'}:
+        items.append(("output", canonical_value(node.outputs[0].default_value, memo)))
+    return items
+
+def node_tree_hash(tree, memo):
+    """节点树的规范哈希：节点按结构标号标识，连线按标号与插槽标识排序后参与哈希
+
+    初始标号为节点内容签名，之后迭代细化：每轮把相邻节点的标号与连接插槽并入自身标号，
+    直到标号划分不再变细。这样内容相同但连线位置不同的节点会得到不同标号，
+    接线方式不同的两个材质不会因连线集合相同而误判为重复。
+    """
+    key = tree.session_uid
+    if key in memo:
+        return memo[key]
+    memo[key] = "recursive"  # 防止节点组自引用导致无限递归
+    node_hash = {}
+    for node in tree.nodes:
+        if node.bl_idname == 'NodeFrame':
+            continue
+        node_hash[node.name] = hashlib.sha1(repr(node_signature(node, memo)).encode()).hexdigest()
+    edges = [(link.from_node.name, link.from_socket.identifier, link.to_node.name, link.to_socket.identifier)
+             for link in tree.links if link.is_valid and not link.is_muted
+             and link.from_node.name in node_hash and link.to_node.name in node_hash]
+    classes = len(set(node_hash.values()))
+    for _ in range(len(node_hash)):
+        neighbours = defaultdict(list)
+        for from_node, from_socket, to_node, to_socket in edges:
+            neighbours[to_node].append(("in", to_socket, node_hash[from_node], from_socket))
+            neighbours[from_node].append(("out", from_socket, node_hash[to_node], to_socket))
+        node_hash = {name: hashlib.sha1(repr((label, sorted(neighbours[name]))).encode()).hexdigest()
+                     for name, label in node_hash.items()}
+        refined = len(set(node_hash.values()))
+        if refined == classes:
+            break
+        classes = refined
+    links = sorted(f"{node_hash[from_node]}:{from_socket}>{node_hash[to_node]}:{to_socket}"
+                   for from_node, from_socket, to_node, to_socket in edges)
+    digest = hashlib.sha1(repr((sorted(node_hash.values()), links)).encode()).hexdigest()
+    memo[key] = digest
+    return digest
+
+def material_hash(mat, memo=None, rebuild=False):
+    """材质内容哈希（节点、连线、默认值与引用的图像），按材质缓存；rebuild=True 时忽略缓存重新计算"""
+    tree = mat.node_tree if mat.use_nodes else None
+    signature = (mat.use_nodes, len(tree.nodes) if tree else 0, len(tree.links) if tree else 0)
+    cached = material_hash_cache.get(mat.session_uid)
+    if cached and cached[0] == signature and not rebuild:
+        return cached[1]
+    memo = {} if memo is None else memo
+    settings = [canonical_value(getattr(mat, ident, None), memo) for ident in MATERIAL_HASH_SETTINGS]
+    tree_digest = node_tree_hash(tree, memo) if tree else None
+    digest = hashlib.sha1(repr((settings, tree_digest)).encode()).hexdigest()
+    material_hash_cache[mat.session_uid] = (signature, digest)
+    return digest
+
+@bpy.app.handlers.persistent
+def invalidate_material_hashes(scene, depsgraph):
+    """材质被编辑后使其哈希失效；节点组或图像变化会影响多个材质，直接清空"""
+    for update in depsgraph.updates:
+        data = update.id
+        if isinstance(data, bpy.types.Material):
+            material_hash_cache.pop(data.original.session_uid, None)
+        elif isinstance(data, (bpy.types.NodeTree, bpy.types.Image)):
+            material_hash_cache.clear()
+            return
+
+def compact_material_slots(me, users=(), material_index=None):
+    """删除网格中未被任何面使用的材质插槽并压缩 material_index，返回删除的插槽数
+
+    users 为使用该网格的物体，用于保留它们物体级链接（link='OBJECT'）的插槽设置。
+    material_index 为已读入的面材质索引（可选，会被原地修改）。
+    """
+    slot_count = len(me.materials)
+    if not slot_count:
+        return 0
+    if material_index is None:
+        material_index = read_array(me.polygons, "material_index", len(me.polygons), np.int32)
+    # 超出范围的索引在渲染时按最后一个插槽处理，这里保持一致
+    np.clip(material_index, 0, slot_count - 1, out=material_index)
+    used = np.bincount(material_index, minlength=slot_count) > 0
+    if used.all():
+        return 0
+    kept = np.flatnonzero(used).tolist()
+    remap = np.cumsum(used, dtype=np.int32) - 1
+    kept_materials = [me.materials[i] for i in kept]
+    saved_slots = [[(slot.link, slot.material) for slot in obj.material_slots] for obj in users]
+    # clear() 会把面索引清零，因此先重建材质列表，再写回重映射后的索引
+    me.materials.clear()
+    for mat in kept_materials:
+        me.materials.append(mat)
+    me.polygons.foreach_set("material_index", remap[material_index])
+    for obj, saved in zip(users, saved_slots):
+        for new_i, old_i in enumerate(kept):
+            link, mat = saved[old_i]
+            if link == 'OBJECT':
+                slot = obj.material_slots[new_i]
+                slot.link = 'OBJECT'
+                slot.material = mat
+    me.update()
+    return slot_count - len(kept)
+
+def collection_rename_plan(objects, unshare_data=False):
+    """按所属集合计算物体及其数据的目标名称，返回 (物体名表, 数据名表, 复制的共享数据数)
+
+    unshare_data 为 True 时为共享数据复制独立副本，否则共享数据以第一个使用者命名。
+    """
+    collection_groups = defaultdict(list)
+    for obj in objects:
+        if obj.library is not None:
+            continue  # 链接数据不可重命名
+        if obj.users_collection:
+            coll_name = obj.users_collection[0].name
+        else:
+            coll_name = "未分类"
+        collection_groups[coll_name].append(obj)
+    object_names = {}
+    data_names = {}
+    copied_count = 0
+    for coll_name, objs in collection_groups.items():
+        for idx, obj in enumerate(objs, 1):
+            new_name = f"{coll_name}_{idx:03d}"
+            object_names[obj] = new_name
+            data = obj.data
+            if data is None or data.library is not None:
+                continue
+            if data.users > 1:
+                if unshare_data:
+                    obj.data = data = data.copy()
+                    copied_count += 1
+                elif data in data_names:
+                    continue  # 共享数据以第一个使用者命名，不复制
+            data_names[data] = new_name
+    return object_names, data_names, copied_count
+
+def collection_path_index(root):
+    """一次深度优先遍历集合树，返回 集合 -> 名称路径元组（根集合为 ("",)）
+
+    被多个父级链接的集合取首次遇到的路径，子树只展开一次。
+    """
+    paths = {root: ("",)}
+    stack = [root]
+    while stack:
+        parent = stack.pop()
+        parent_path = paths[parent]
+        for child in reversed(parent.children[:]):
+            if child not in paths:
+                paths[child] = parent_path + (child.name,)
+                stack.append(child)
+    return paths
+
+def split_mesh_by_material(obj):
+    """按 material_index 把物体拆分为每个材质一个物体，不进入编辑模式，返回新建的物体列表"""
+    me = obj.data
+    slot_count = max(len(me.materials), 1)
+    material_index = read_array(me.polygons, "material_index", len(me.polygons), np.int32)
+    np.clip(material_index, 0, slot_count - 1, out=material_index)
+    return [part for _, part in split_mesh_by_faces(obj, material_index)]
+
+def split_mesh_by_faces(obj, face_labels):
+    """按面标签把物体拆分为每个标签一个物体，不进入编辑模式
+
+    原物体保留最小标签的面及所有松散顶点/边，其余标签各生成一个 obj.copy()。
+    通用属性、UV、自定义法线与顶点组权重按数组切片复制。返回新建的 [(标签, 物体)]。
+    """
+    me = obj.data
+    sizes = mesh_domain_sizes(me)
+    nv, ne, nf, nl = sizes['POINT'], sizes['EDGE'], sizes['FACE'], sizes['CORNER']
+    used = np.unique(face_labels)
+    if len(used) < 2:
+        return []
+    material_index = read_array(me.polygons, "material_index", nf, np.int32)
+
+    # 一次读入全部数组，之后只做切片
+    co = read_array(me.vertices, "co", nv * 3, np.float32).reshape(-1, 3)
+    edge_verts = read_array(me.edges, "vertices", ne * 2, np.int32).reshape(-1, 2)
+    loop_verts = read_array(me.loops, "vertex_index", nl, np.int32)
+    loop_edges = read_array(me.loops, "edge_index", nl, np.int32)
+    loop_totals = read_array(me.polygons, "loop_total", nf, np.int32)
+    loop_labels = np.repeat(face_labels, loop_totals)
+    attributes = read_attributes(me)
+    normals = None
+    if me.has_custom_normals:
+        normals = read_array(me.corner_normals, "vector", nl * 3, np.float32).reshape(-1, 3)
+    active_uv = me.uv_layers.active.name if me.uv_layers.active else None
+    materials = list(me.materials)
+    properties = {key: me[key] for key in me.keys()}
+    group_names = [vg.name for vg in obj.vertex_groups]
+    if group_names:
+        # 写入新网格的权重必须来自最新数据，不使用缓存
+        vert_idx, group_idx, group_weights = vertex_group_index(obj, rebuild=True)
+    collections = list(obj.users_collection)
+    # 不属于任何面的松散顶点/边留在原物体上
+    loose_verts = np.ones(nv, dtype=bool)
+    loose_verts[loop_verts] = False
+    loose_edges = np.ones(ne, dtype=bool)
+    loose_edges[loop_edges] = False
+
+    new_objects = []
+    for i, label in enumerate(used.tolist()):
+        face_idx = np.flatnonzero(face_labels == label)
+        loop_idx = np.flatnonzero(loop_labels == label)
+        vert_keep = np.zeros(nv, dtype=bool)
+        vert_keep[loop_verts[loop_idx]] = True
+        edge_keep = np.zeros(ne, dtype=bool)
+        edge_keep[loop_edges[loop_idx]] = True
+        if i == 0:
+            edge_keep |= loose_edges
+            vert_keep |= loose_verts
+            vert_keep[edge_verts[loose_edges].ravel()] = True
+        verts = np.flatnonzero(vert_keep)
+        edges = np.flatnonzero(edge_keep)
+        vert_map = np.full(nv, -1, dtype=np.int32)
+        vert_map[verts] = np.arange(len(verts), dtype=np.int32)
+        edge_map = np.full(ne, -1, dtype=np.int32)
+        edge_map[edges] = np.arange(len(edges), dtype=np.int32)
+        face_totals = loop_totals[face_idx]
+        loop_starts = np.zeros(len(face_idx), dtype=np.int32)
+        np.cumsum(face_totals[:-1], out=loop_starts[1:])
+
+        new_me = bpy.data.meshes.new(me.name)
+        write_mesh_topology(new_me, co[verts], vert_map[edge_verts[edges]].ravel(),
+                            vert_map[loop_verts[loop_idx]], edge_map[loop_edges[loop_idx]],
+                            loop_starts, material_index[face_idx])
+        for mat in materials:
+            new_me.materials.append(mat)
+        for key, value in properties.items():
+            new_me[key] = value
+        write_attributes(new_me, attributes, {'POINT': verts, 'EDGE': edges, 'FACE': face_idx, 'CORNER': loop_idx})
+        if active_uv and active_uv in new_me.uv_layers:
+            new_me.uv_layers.active = new_me.uv_layers[active_uv]
+        new_me.update()
+        if normals is not None:
+            new_me.normals_split_custom_set(normals[loop_idx])
+
+        if i == 0:
+            part = obj
+        else:
+            part = obj.copy()
+            for col in collections:
+                col.objects.link(part)
+            new_objects.append((label, part))
+        part.data = new_me
+        # 顶点组名存放在网格上，新网格需要重建顶点组并写回权重
+        for name in group_names:
+            part.vertex_groups.new(name=name)
+        if group_names:
+            in_part = vert_keep[vert_idx] & (group_idx < len(group_names))
+            for group in np.unique(group_idx[in_part]).tolist():
+                mask = in_part & (group_idx == group)
+                add_group_weights(part.vertex_groups[group], vert_map[vert_idx[mask]], group_weights[mask])
+    return new_objects
+
+NEIGHBOR_OFFSETS = np.array([(dx, dy, dz) for dx in (-1, 0, 1) for dy in (-1, 0, 1) for dz in (-1, 0, 1)],
+                            dtype=np.int64)
+
+def cell_codes(cells):
+    """把整数格子坐标散列为 int64（允许冲突，调用方会再比较实际距离）"""
+    return (cells[:, 0] * 73856093) ^ (cells[:, 1] * 19349663) ^ (cells[:, 2] * 83492791)
+
+def weld_clusters(co, tolerance):
+    """空间哈希焊接：返回每个顶点所在簇的代表顶点索引（簇内最小索引）
+
+    顶点按容差量化到格子，只与本格及相邻 26 格中的顶点比较距离；
+    距离不超过容差的顶点对通过标签传播合并为簇（可传递）。
+    """
+    count = len(co)
+    labels = np.arange(count)
+    if count < 2:
+        return labels
+    cells = np.floor(co / tolerance).astype(np.int64)
+    codes = cell_codes(cells)
+    order = np.argsort(codes, kind='stable')
+    sorted_codes = codes[order]
+    indices = np.arange(count)
+    pair_i, pair_j = [], []
+    for offset in NEIGHBOR_OFFSETS:
+        neighbor = cell_codes(cells + offset)
+        lo = np.searchsorted(sorted_codes, neighbor, 'left')
+        counts = np.searchsorted(sorted_codes, neighbor, 'right') - lo
+        total = int(counts.sum())
+        if not total:
+            continue
+        i = np.repeat(indices, counts)
+        j = order[np.repeat(lo - (np.cumsum(counts) - counts), counts) + np.arange(total)]
+        near = (i < j) & (((co[i] - co[j]) ** 2).sum(axis=1) <= tolerance * tolerance)
+        pair_i.append(i[near])
+        pair_j.append(j[near])
+    pair_i = np.concatenate(pair_i)
+    pair_j = np.concatenate(pair_j)
+    while len(pair_i):
+        low = np.minimum(labels[pair_i], labels[pair_j])
+        previous = labels.copy()
+        np.minimum.at(labels, pair_i, low)
+        np.minimum.at(labels, pair_j, low)
+        labels = labels[labels]
+        if np.array_equal(labels, previous):
+            break
+    return labels
+
+def weld_mesh(obj, tolerance, users=None):
+    """不进入编辑模式合并网格中距离在容差内的顶点，返回 (焊接前顶点数, 焊接后顶点数)
+
+    焊接后退化的角点被删除，不足三个角点或不相邻角点焊到同一顶点（对折、自接触）的面被删除，重合的边去重。
+    材质索引、通用属性、UV、自定义法线与顶点组权重按保留的元素切片复制。
+    新网格替换 users 中所有物体（默认仅 obj）的网格，原网格由调用方统一删除。
+    """
+    me = obj.data
+    sizes = mesh_domain_sizes(me)
+    nv, ne, nf, nl = sizes['POINT'], sizes['EDGE'], sizes['FACE'], sizes['CORNER']
+    co = read_array(me.vertices, "co", nv * 3, np.float32).reshape(-1, 3)
+    labels = weld_clusters(co.astype(np.float64), tolerance)
+    vert_keep = labels == np.arange(nv)
+    if vert_keep.all():
+        return nv, nv
+    verts = np.flatnonzero(vert_keep)
+    vert_map = (np.cumsum(vert_keep) - 1)[labels].astype(np.int32)
+
+    # 角点：焊接后与下一个角点重合的角点删除，剩余不足三个角点的面删除；
+    # 剩余角点中仍有重复顶点的面（不相邻角点焊接在一起）无效，也删除
+    loop_verts = vert_map[read_array(me.loops, "vertex_index", nl, np.int32)]
+    loop_edges = read_array(me.loops, "edge_index", nl, np.int32)
+    loop_starts = read_array(me.polygons, "loop_start", nf, np.int32)
+    loop_totals = read_array(me.polygons, "loop_total", nf, np.int32)
+    material_index = read_array(me.polygons, "material_index", nf, np.int32)
+    next_loop = np.arange(1, nl + 1)
+    next_loop[loop_starts + loop_totals - 1] = loop_starts
+    loop_keep = loop_verts != loop_verts[next_loop]
+    face_totals = np.add.reduceat(loop_keep.astype(np.int32), loop_starts) if nf else loop_totals
+    face_keep = face_totals >= 3
+    kept = np.flatnonzero(loop_keep)
+    corner_codes = np.sort(np.repeat(np.arange(nf, dtype=np.int64), loop_totals)[kept] * len(verts) + loop_verts[kept])
+    face_keep[corner_codes[1:][corner_codes[1:] == corner_codes[:-1]] // len(verts)] = False
+    loop_keep &= np.repeat(face_keep, loop_totals)
+    faces = np.flatnonzero(face_keep)
+    loops = np.flatnonzero(loop_keep)
+    new_starts = np.zeros(len(faces), dtype=np.int32)
+    np.cumsum(face_totals[faces][:-1], out=new_starts[1:])
+
+    # 边：重映射端点后删除退化边，端点相同的边只保留第一条
+    edge_verts = np.sort(vert_map[read_array(me.edges, "vertices", ne * 2, np.int32).reshape(-1, 2)], axis=1)
+    edge_codes = edge_verts[:, 0].astype(np.int64) * len(verts) + edge_verts[:, 1]
+    edge_codes[edge_verts[:, 0] == edge_verts[:, 1]] = -1
+    unique_codes, edges, edge_map = np.unique(edge_codes, return_index=True, return_inverse=True)
+    skip = int(len(unique_codes) > 0 and unique_codes[0] == -1)
+    edges = edges[skip:]
+    edge_map = (edge_map.ravel() - skip).astype(np.int32)
+
+    attributes = read_attributes(me)
+    normals = None
+    if me.has_custom_normals:
+        normals = read_array(me.corner_normals, "vector", nl * 3, np.float32).reshape(-1, 3)
+    active_uv = me.uv_layers.active.name if me.uv_layers.active else None
+    group_names = [vg.name for vg in obj.vertex_groups]
+    if group_names:
+        # 写入新网格的权重必须来自最新数据，不使用缓存
+        vert_idx, group_idx, group_weights = vertex_group_index(obj, rebuild=True)
+
+    new_me = bpy.data.meshes.new(me.name)
+    write_mesh_topology(new_me, co[verts], edge_verts[edges].ravel(), loop_verts[loops],
+                        edge_map[loop_edges[loops]], new_starts, material_index[faces])
+    for mat in me.materials:
+        new_me.materials.append(mat)
+    for key in me.keys():
+        new_me[key] = me[key]
+    write_attributes(new_me, attributes, {'POINT': verts, 'EDGE': edges, 'FACE': faces, 'CORNER': loops})
+    if active_uv and active_uv in new_me.uv_layers:
+        new_me.uv_layers.active = new_me.uv_layers[active_uv]
+    new_me.update()
+    if normals is not None:
+        new_me.normals_split_custom_set(normals[loops])
+    for user in users or (obj,):
+        user.data = new_me
+    # 顶点组名存放在网格上，重建后写回权重；同一顶点合并后的权重取最大值
+    for name in group_names:
+        obj.vertex_groups.new(name=name)
+    if group_names:
+        valid = group_idx < len(group_names)
+        targets = vert_map[vert_idx[valid]]
+        groups = group_idx[valid]
+        weights = group_weights[valid]
+        order = np.lexsort((-weights, groups, targets))
+        pair_codes = targets[order].astype(np.int64) * len(group_names) + groups[order]
+        first = np.ones(len(order), dtype=bool)
+        first[1:] = pair_codes[1:] != pair_codes[:-1]
+        order = order[first]
+        for group in np.unique(groups[order]).tolist():
+            mask = order[groups[order] == group]
+            add_group_weights(obj.vertex_groups[group], targets[mask], weights[mask])
+    return nv, len(verts)
+
+def bulk_rename(name_map):
+    """两阶段批量重命名 {数据块: 新名称}，返回实际改名数量
+
+    先把所有待改名的数据块改为临时唯一名以释放旧名，再赋最终名，
+    避免目标名被批次内其他数据块占用时产生 .001 冲突级联。
+    """
+    pending = [(data, name) for data, name in name_map.items() if data.name != name]
+    for i, (data, _) in enumerate(pending):
+        data.name = f"__at_tmp_{i}"
+    for data, name in pending:
+        data.name = name
+    return len(pending)
+
+def clear_custom_normals(me):
+    """直接删除网格的 custom_normal 属性，返回是否成功（旧版本没有该属性时返回 False）"""
+    attr = me.attributes.get("custom_normal")
+    if attr is None:
+        return False
+    me.attributes.remove(attr)
+    return True
+
+def is_triangulated(me):
+    """网格的所有面是否都已是三角面"""
+    loop_totals = read_array(me.polygons, "loop_total", len(me.polygons), np.int32)
+    return bool((loop_totals == 3).all())
+
+# 三角化修改器的四边形方式 -> bmesh.ops.triangulate 的对应枚举
+TRIANGULATE_QUAD_METHODS = {
+    'BEAUTY': 'BEAUTY',
+    'FIXED': 'FIXED',
+    'FIXED_ALTERNATE': 'ALTERNATE',
+    'SHORTEST_DIAGONAL': 'SHORT_EDGE',
+    'LONGEST_DIAGONAL': 'LONG_EDGE',
+}
+# 三角化修改器的多边形方式 -> bmesh.ops.triangulate 的对应枚举
+TRIANGULATE_NGON_METHODS = {
+    'BEAUTY': 'BEAUTY',
+    'CLIP': 'EAR_CLIP',
+}
+
+def triangulate_mesh(me, modifier=None):
+    """直接在网格数据中三角化，保留自定义法线
+
+    给定三角化修改器时沿用其四边形/多边形方式与最少顶点数，否则使用修改器默认设置。
+    自定义法线先写入临时角点属性，随 BMesh 三角化复制到新的角点，再重新设置。
+    """
+    quad_method, ngon_method, min_vertices = 'SHORT_EDGE', 'BEAUTY', 4
+    if modifier is not None:
+        quad_method = TRIANGULATE_QUAD_METHODS.get(modifier.quad_method, quad_method)
+        ngon_method = TRIANGULATE_NGON_METHODS.get(modifier.ngon_method, ngon_method)
+        min_vertices = modifier.min_vertices
+    temp_name = "__at_corner_normal"
+    if me.has_custom_normals:
+        normals = read_array(me.corner_normals, "vector", len(me.loops) * 3, np.float32)
+        me.attributes.new(temp_name, 'FLOAT_VECTOR', 'CORNER').data.foreach_set("vector", normals)
+    bm = bmesh.new()
+    bm.from_mesh(me)
+    faces = [face for face in bm.faces if len(face.verts) >= min_vertices]
+    bmesh.ops.triangulate(bm, faces=faces, quad_method=quad_method, ngon_method=ngon_method)
+    bm.to_mesh(me)
+    bm.free()
+    attr = me.attributes.get(temp_name)
+    if attr is not None:
+        normals = read_array(attr.data, "vector", len(me.loops) * 3, np.float32)
+        me.attributes.remove(attr)
+        me.normals_split_custom_set(normals.reshape(-1, 3))
+    me.update()
+
+def mesh_memory(me):
+    """估算网格数组数据的内存占用（字节）：所有属性层加面偏移表"""
+    sizes = mesh_domain_sizes(me)
+    total = (sizes['FACE'] + 1) * 4
+    for attr in me.attributes:
+        layout = ATTRIBUTE_LAYOUT.get(attr.data_type)
+        if layout:
+            total += sizes[attr.domain] * layout[1] * np.dtype(layout[2]).itemsize
+    return total
+
+def geometry_key(obj, tolerance):
+    """与平移、旋转无关的网格几何哈希，返回 (哈希, 去质心后的顶点坐标, 质心)
+
+    哈希包含拓扑数组、材质、通用属性、顶点组权重，以及按容差量化的顶点到质心距离。
+    哈希相同只是候选，仍需用 rigid_rotation 逐顶点确认。
+    """
+    me = obj.data
+    sizes = mesh_domain_sizes(me)
+    nv, ne, nf, nl = sizes['POINT'], sizes['EDGE'], sizes['FACE'], sizes['CORNER']
+    co = read_array(me.vertices, "co", nv * 3, np.float32).reshape(-1, 3).astype(np.float64)
+    centroid = co.mean(axis=0)
+    centered = co - centroid
+    digest = hashlib.sha1()
+    digest.update(repr((nv, ne, nf, nl, [mat.session_uid if mat else None for mat in me.materials],
+                        me.has_custom_normals, [vg.name for vg in obj.vertex_groups])).encode())
+    digest.update(read_array(me.edges, "vertices", ne * 2, np.int32).tobytes())
+    digest.update(read_array(me.loops, "vertex_index", nl, np.int32).tobytes())
+    digest.update(read_array(me.polygons, "loop_start", nf, np.int32).tobytes())
+    digest.update(read_array(me.polygons, "material_index", nf, np.int32).tobytes())
+    for name, (domain, data_type, values) in sorted(read_attributes(me).items()):
+        digest.update(name.encode())
+        digest.update(np.ascontiguousarray(values).tobytes())
+    if obj.vertex_groups:
+        # 哈希决定网格是否被替换，权重必须来自最新数据
+        for values in vertex_group_index(obj, rebuild=True):
+            digest.update(values.tobytes())
+    if me.has_custom_normals:
+        normals = read_array(me.corner_normals, "vector", nl * 3, np.float32)
+        digest.update(np.round(normals / tolerance).astype(np.int64).tobytes())
+    distances = np.sqrt((centered ** 2).sum(axis=1))
+    digest.update(np.round(distances / tolerance).astype(np.int64).tobytes())
+    return digest.hexdigest(), centered, centroid
+
+def rigid_rotation(source, target):
+    """Kabsch 算法：求旋转矩阵 R 使 target ≈ source @ R.T（排除镜像），返回 (R, 最大偏差)"""
+    u, _, vt = np.linalg.svd(source.T @ target)
+    d = np.sign(np.linalg.det(vt.T @ u.T)) or 1.0
+    rotation = vt.T @ np.diag((1.0, 1.0, d)) @ u.T
+    residual = np.abs(source @ rotation.T - target).max() if len(source) else 0.0
+    return rotation, residual
+
+# 物体变换相关的动画路径（有这些动画时 matrix_basis 会在换帧时被覆盖）
+TRANSFORM_PATHS = ('location', 'rotation_euler', 'rotation_quaternion', 'rotation_axis_angle', 'scale',
+                   'delta_location', 'delta_rotation_euler', 'delta_rotation_quaternion', 'delta_scale')
+
+def has_transform_animation(obj):
+    """物体的位置/旋转/缩放是否由动作、NLA 或驱动器控制"""
+    anim = obj.animation_data
+    if anim is None:
+        return False
+    if len(anim.nla_tracks):
+        return True
+    curves = list(anim.drivers)
+    if anim.action is not None:
+        curves.extend(anim.action.fcurves)
+    return any(curve.data_path in TRANSFORM_PATHS for curve in curves)
+
+def instance_correction(rotation, source_centroid, target_centroid):
+    """把共享网格（源）摆到原网格（目标）位置所需的局部变换矩阵"""
+    correction = Matrix.Identity(4)
+    for row in range(3):
+        for col in range(3):
+            correction[row][col] = rotation[row, col]
+        correction[row][3] = target_centroid[row] - rotation[row] @ source_centroid
+    return correction
+
+def apply_instance_correction(owners, correction):
+    """把修正矩阵右乘到各物体的 matrix_basis，并补偿子物体使其世界变换不变
+
+    子物体需反向补偿父级逆矩阵才能保持原位；顶点父级只取顶点的世界位置，替换前后不变，无需补偿。
+    """
+    inverse = correction.inverted()
+    for obj in owners:
+        obj.matrix_basis = obj.matrix_basis @ correction
+        for child in obj.children:
+            if child.parent_type == 'OBJECT':
+                child.matrix_parent_inverse = inverse @ child.matrix_parent_inverse
+
+# 导出检查类别：(标识, 名称, 说明)
+AUDIT_CATEGORIES = (
+    ('NON_UNIT_SCALE', "非常规缩放", "缩放不等于 1 的物体"),
+    ('NEGATIVE_SCALE', "负缩放/镜像", "存在负缩放分量的物体（法线可能翻转）"),
+    ('ROTATION', "未应用旋转", "旋转不为零的物体"),
+    ('ZERO_SIZE', "零尺寸", "缩放为零或几何尺寸为零的物体"),
+    ('NGONS', "含多边形面", "网格中含有超过四边的面"),
+    ('LOOSE_VERTS', "含松散顶点", "网格中含有不属于任何边的顶点"),
+    ('ZERO_AREA', "含零面积面", "网格中含有面积为零的面"),
+)
+# 最近一次导出检查结果：场景名 -> {类别: [物体名]}
+audit_results = {}
+GEOMETRY_TYPES = {'MESH', 'CURVE', 'SURFACE', 'FONT', 'META'}
+
+def read_scales(objects):
+    """以数组方式读取物体集合的缩放，返回 (n, 3) 数组"""
+    return read_array(objects, "scale", len(objects) * 3, np.float32).reshape(-1, 3)
+
+def audit_scene(scene, tolerance=0.001):
+    """一次性检查场景中所有物体的变换与网格问题，返回 {类别: [物体名]}"""
+    objects = scene.objects
+    obj_list = list(objects)
+    count = len(obj_list)
+    eps = 1e-6
+    # --- 物体变换：foreach_get 读入数组后统一判断 ---
+    scale = read_scales(objects)
+    dimensions = read_array(objects, "dimensions", count * 3, np.float32).reshape(-1, 3)
+    euler = read_array(objects, "rotation_euler", count * 3, np.float32).reshape(-1, 3)
+    quat = read_array(objects, "rotation_quaternion", count * 4, np.float32).reshape(-1, 4)
+    axis_angle = read_array(objects, "rotation_axis_angle", count * 4, np.float32).reshape(-1, 4)
+    rotation_mode = np.array([obj.rotation_mode for obj in obj_list], dtype=object)
+    has_geometry = np.array([obj.type in GEOMETRY_TYPES for obj in obj_list], dtype=bool)
+
+    rotated = (np.abs(euler) > tolerance).any(axis=1)
+    is_quat = rotation_mode == 'QUATERNION'
+    rotated[is_quat] = (np.abs(quat[is_quat] - (1.0, 0.0, 0.0, 0.0)) > tolerance).any(axis=1)
+    is_axis = rotation_mode == 'AXIS_ANGLE'
+    rotated[is_axis] = np.abs(axis_angle[is_axis, 0]) > tolerance
+
+    flags = {
+        'NON_UNIT_SCALE': (np.abs(scale - 1.0) > tolerance).any(axis=1),
+        'NEGATIVE_SCALE': (scale < 0.0).any(axis=1),
+        'ROTATION': rotated,
+        'ZERO_SIZE': (np.abs(scale) < eps).any(axis=1) | (has_geometry & (dimensions.max(axis=1) < eps)),
+    }
+
+    # --- 网格检查：每个网格只计算一次 ---
+    mesh_flags = {}
+    for obj in obj_list:
+        me = obj.data if obj.type == 'MESH' else None
+        if me is None or me in mesh_flags:
+            continue
+        nv, ne, nf = len(me.vertices), len(me.edges), len(me.polygons)
+        loop_totals = read_array(me.polygons, "loop_total", nf, np.int32)
+        area = read_array(me.polygons, "area", nf, np.float32)
+        in_edge = np.zeros(nv, dtype=bool)
+        in_edge[read_array(me.edges, "vertices", ne * 2, np.int32)] = True
+        mesh_flags[me] = (bool((loop_totals > 4).any()), bool(not in_edge.all()), bool((area < 1e-12).any()))
+    for i, key in enumerate(('NGONS', 'LOOSE_VERTS', 'ZERO_AREA')):
+        flags[key] = np.array([obj.type == 'MESH' and mesh_flags[obj.data][i] for obj in obj_list], dtype=bool)
+
+    names = np.array([obj.name for obj in obj_list], dtype=object)
+    return {key: names[flags[key]].tolist() for key, _, _ in AUDIT_CATEGORIES}
+
+def select_objects_by_name(context, names):
+    """取消所有选择后按名称选择物体，返回选中数量"""
+    for obj in context.view_layer.objects:
+        obj.select_set(False)
+    selected_count = 0
+    view_layer_objects = context.view_layer.objects
+    for name in names:
+        obj = view_layer_objects.get(name)
+        if obj is not None:
+            obj.select_set(True)
+            selected_count += 1
+    return selected_count
+
+def world_matrices(objects):
+    """返回物体世界矩阵数组 (n, 4, 4)"""
+    return np.array([obj.matrix_world for obj in objects], dtype=np.float64).reshape(-1, 4, 4)
+
+def world_bounds(objects, matrices):
+    """由局部包围盒角点计算世界空间轴对齐包围盒，返回 (最小值, 最大值) 两个 (n, 3) 数组"""
+    corners = np.array([[tuple(corner) for corner in obj.bound_box] for obj in objects],
+                       dtype=np.float64).reshape(-1, 8, 3)
+    world = corners @ matrices[:, :3, :3].transpose(0, 2, 1) + matrices[:, None, :3, 3]
+    return world.min(axis=1), world.max(axis=1)
+
+def coincident_candidates(lo, hi, tolerance):
+    """用均匀网格（格子边长 = 容差）查找包围盒中心和尺寸都几乎相同的物体对
+
+    每个物体只与所在格子及相邻 26 个格子中的物体比较，期望复杂度接近 O(n)。
+    """
+    centers = (lo + hi) * 0.5
+    sizes = hi - lo
+    grid = defaultdict(list)
+    for i, key in enumerate(map(tuple, np.floor(centers / tolerance).astype(np.int64).tolist())):
+        grid[key].append(i)
+    grid = {key: np.array(members) for key, members in grid.items()}
+    offsets = [(dx, dy, dz) for dx in (-1, 0, 1) for dy in (-1, 0, 1) for dz in (-1, 0, 1)]
+    pairs = []
+    for (x, y, z), members in grid.items():
+        for dx, dy, dz in offsets:
+            neighbors = grid.get((x + dx, y + dy, z + dz))
+            if neighbors is None:
+                continue
+            close = ((np.abs(centers[members, None] - centers[None, neighbors]) <= tolerance).all(axis=2)
+                     & (np.abs(sizes[members, None] - sizes[None, neighbors]) <= tolerance).all(axis=2))
+            close &= members[:, None] < neighbors[None, :]
+            rows, cols = np.nonzero(close)
+            pairs.extend(zip(members[rows].tolist(), neighbors[cols].tolist()))
+    return pairs
+
+def same_world_geometry(a, b, matrix_a, matrix_b, local_co, tolerance):
+    """比较两个网格物体的世界空间顶点；顶点顺序不同时退回到排序后比较"""
+    me_a, me_b = a.data, b.data
+    if len(me_a.vertices) != len(me_b.vertices) or len(me_a.polygons) != len(me_b.polygons):
+        return False
+    for me in (me_a, me_b):
+        if me not in local_co:
+            local_co[me] = read_array(me.vertices, "co", len(me.vertices) * 3, np.float32).reshape(-1, 3)
+    world_a = local_co[me_a] @ matrix_a[:3, :3].T + matrix_a[:3, 3]
+    world_b = local_co[me_b] @ matrix_b[:3, :3].T + matrix_b[:3, 3]
+    if np.abs(world_a - world_b).max(initial=0.0) <= tolerance:
+        return True
+    rounded_a = np.round(world_a / tolerance)
+    rounded_b = np.round(world_b / tolerance)
+    return np.array_equal(rounded_a[np.lexsort(rounded_a.T)], rounded_b[np.lexsort(rounded_b.T)])
+
+def find_coincident_duplicates(objects, tolerance):
+    """返回重合的重复物体列表（每组按名称保留第一个，其余视为重复）"""
+    objects = sorted(objects, key=lambda obj: obj.name)
+    matrices = world_matrices(objects)
+    lo, hi = world_bounds(objects, matrices)
+    local_co = {}
+    parent = list(range(len(objects)))
+    def root(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+    for i, j in coincident_candidates(lo, hi, tolerance):
+        ri, rj = root(i), root(j)
+        if ri != rj and same_world_geometry(objects[i], objects[j], matrices[i], matrices[j], local_co, tolerance):
+            parent[max(ri, rj)] = min(ri, rj)
+    return [obj for i, obj in enumerate(objects) if root(i) != i]
+
+# 场景属性索引使用的缩放容差（与 select_non_uniform_scale 默认值一致）
+INDEX_SCALE_TOLERANCE = 0.001
+
+class SceneAttributeIndex:
+    """场景物体属性索引，由 depsgraph_update_post 回调按变化的物体/网格增量维护
+
+    按材质插槽数与非常规缩放分桶，select_* 操作符只需遍历命中的物体。
+    """
+    def __init__(self, scene):
+        self.records = {}                   # object.session_uid -> 属性记录
+        self.by_slots = defaultdict(set)    # 材质插槽数 -> object.session_uid
+        self.non_unit_scale = set()
+        self.mesh_users = defaultdict(set)  # mesh.session_uid -> object.session_uid
+        for obj in scene.objects:
+            self.update_object(obj)
+
+    def update_object(self, obj):
+        uid = obj.session_uid
+        self.remove(uid)
+        me = obj.data if obj.type == 'MESH' else None
+        record = {
+            'object': obj,
+            'type': obj.type,
+            'slots': len(obj.material_slots),
+            'non_unit_scale': any(abs(v - 1.0) > INDEX_SCALE_TOLERANCE for v in obj.scale),
+            'vertex_groups': len(obj.vertex_groups),
+            'polygons': len(me.polygons) if me else 0,
+            'modifiers': tuple(mod.type for mod in obj.modifiers),
+            'mesh': me.session_uid if me else None,
+        }
+        self.records[uid] = record
+        self.by_slots[record['slots']].add(uid)
+        if record['non_unit_scale']:
+            self.non_unit_scale.add(uid)
+        if me:
+            self.mesh_users[record['mesh']].add(uid)
+
+    def remove(self, uid):
+        record = self.records.pop(uid, None)
+        if record is None:
+            return
+        self.by_slots[record['slots']].discard(uid)
+        self.non_unit_scale.discard(uid)
+        if record['mesh'] is not None:
+            self.mesh_users[record['mesh']].discard(uid)
+
+    def sync_members(self, scene):
+        """补录依赖图尚未报告的新物体（脚本或后台新建/链接后未求值），移除已不在场景中的物体"""
+        objects = {obj.session_uid: obj for obj in scene.objects}
+        for uid in self.records.keys() - objects.keys():
+            self.remove(uid)
+        for uid in objects.keys() - self.records.keys():
+            self.update_object(objects[uid])
+
+    def update_mesh(self, mesh_uid):
+        for uid in list(self.mesh_users.get(mesh_uid, ())):
+            record = self.records.get(uid)
+            if record is not None:
+                self.update_object(record['object'])
+
+    def resolve(self, uids, scene):
+        """把 uid 转回仍在场景中的物体；已删除或移出场景的物体从索引中移除"""
+        objects = []
+        for uid in list(uids):
+            obj = self.records[uid]['object']
+            try:
+                in_scene = scene in obj.users_scene
+            except ReferenceError:
+                in_scene = False
+            if in_scene:
+                objects.append(obj)
+            else:
+                self.remove(uid)
+        return objects
+
+    def objects_with_slots(self, scene, min_slots, object_type='MESH'):
+        uids = [uid for count, bucket in self.by_slots.items() if count >= min_slots for uid in bucket
+                if self.records[uid]['type'] == object_type]
+        return self.resolve(uids, scene)
+
+    def objects_with_non_unit_scale(self, scene):
+        return self.resolve(self.non_unit_scale, scene)
+
+# 场景 session_uid -> SceneAttributeIndex，首次查询时建立
+scene_indices = {}
+
+def scene_attribute_index(scene):
+    """返回场景属性索引（不存在则建立）
+
+    查询前先求值依赖图，使脚本中尚未求值的修改经 depsgraph_update_post 回调进入索引，
+    再核对成员，补上依赖图没有报告的物体。
+    """
+    index = scene_indices.get(scene.session_uid)
+    if index is None:
+        index = scene_indices[scene.session_uid] = SceneAttributeIndex(scene)
+        return index
+    if bpy.context.scene == scene:
+        bpy.context.evaluated_depsgraph_get()
+    index.sync_members(scene)
+    return index
+
+@bpy.app.handlers.persistent
+def update_scene_indices(scene, depsgraph):
+    """只根据依赖图报告的变化物体和网格增量更新已建立的场景索引"""
+    index = scene_indices.get(scene.session_uid)
+    if index is None:
+        return
+    for update in depsgraph.updates:
+        data = update.id
+        if isinstance(data, bpy.types.Object):
+            index.update_object(data.original)
+        elif isinstance(data, bpy.types.Mesh) and update.is_updated_geometry:
+            index.update_mesh(data.original.session_uid)
+
+@bpy.app.handlers.persistent
+def reset_scene_indices(*_args):
+    """撤销/重做/打开文件后数据块地址与内容会变化，清空索引与顶点组缓存等待下次查询时重建"""
+    scene_indices.clear()
+    group_index_cache.clear()
+
+# 网格级缓存：mesh.session_uid -> (拓扑签名, 数据)，拓扑变化后自动失效；
+# 权重绘制、编辑模式指定/移除不改变数量，由 depsgraph 回调丢弃对应网格的缓存
+group_index_cache = {}
+
+@bpy.app.handlers.persistent
+def invalidate_group_indices(scene, depsgraph):
+    """网格几何（含顶点权重）被修改后使其顶点组归属缓存失效"""
+    for update in depsgraph.updates:
+        data = update.id
+        if isinstance(data, bpy.types.Mesh) and update.is_updated_geometry:
+            group_index_cache.pop(data.original.session_uid, None)
+
+def mesh_signature(obj):
+    """用于判断缓存是否失效的拓扑签名"""
+    me = obj.data
+    return (len(me.vertices), len(me.edges), len(me.loops), len(me.polygons), len(obj.vertex_groups))
+
+def vertex_group_index(obj, rebuild=False):
+    """返回网格的顶点-顶点组归属表 (顶点索引数组, 顶点组索引数组, 权重数组)，按网格缓存"""
+    me = obj.data
+    signature = mesh_signature(obj)
+    cached = group_index_cache.get(me.session_uid)
+    if cached and cached[0] == signature and not rebuild:
+        return cached[1]
+    entries = [(v.index, g.group, g.weight) for v in me.vertices for g in v.groups]
+    entries = np.array(entries, dtype=np.float64).reshape(-1, 3)
+    index = (entries[:, 0].astype(np.int32), entries[:, 1].astype(np.int32), entries[:, 2].astype(np.float32))
+    group_index_cache[me.session_uid] = (signature, index)
+    return index
+
+def remove_unused_vertex_groups(obj):
+    """删除没有任何顶点引用的顶点组，返回删除数量（顶点组名存放在网格上，共享网格只需处理一次）
+
+    删除是破坏性操作，总是重新扫描权重而不信任缓存（脚本修改权重后依赖图可能尚未更新）。
+    """
+    me = obj.data
+    vert_idx, group_idx, weights = vertex_group_index(obj, rebuild=True)
+    keep = np.zeros(len(obj.vertex_groups), dtype=bool)
+    used = np.unique(group_idx)
+    keep[used[used < len(keep)]] = True
+    removed = int(len(keep) - keep.sum())
+    if not removed:
+        return 0
+    if not keep.any():
+        obj.vertex_groups.clear()
+    else:
+        for i in reversed(np.flatnonzero(~keep).tolist()):
+            obj.vertex_groups.remove(obj.vertex_groups[i])
+    # 删除后剩余顶点组索引前移，直接重映射缓存而不是重新扫描
+    if len(group_idx) and group_idx.max() < len(keep):
+        new_index = np.cumsum(keep) - 1
+        group_index_cache[me.session_uid] = (mesh_signature(obj), (vert_idx, new_index[group_idx].astype(np.int32), weights))
+    else:
+        group_index_cache.pop(me.session_uid, None)
+    return removed
+
+@bpy.app.handlers.persistent
+def clear_caches(_dummy=None):
+    """打开新文件时清空所有缓存"""
+    group_index_cache.clear()
+    material_hash_cache.clear()
+    audit_results.clear()
+    scene_indices.clear()
+
+# ---------------------- 性能分析 ----------------------
+# 参与统计新增/删除数量的数据块类型
+PROFILED_DATA = ('objects', 'meshes', 'materials', 'collections', 'node_groups', 'images')
+PROFILE_HISTORY = 200
+# 最近的操作符执行记录（新的在后），仅在开启性能分析时写入
+profile_records = []
+
+def data_snapshot():
+    """记录各类数据块的 session_uid，以及物体/网格的轻量状态签名"""
+    ids = {attr: {id_data.session_uid for id_data in getattr(bpy.data, attr)} for attr in PROFILED_DATA}
+    objects = {obj.session_uid: (obj.name, obj.data.session_uid if obj.data else None,
+                                 obj.parent.session_uid if obj.parent else None, len(obj.users_collection),
+                                 len(obj.material_slots), len(obj.vertex_groups), len(obj.modifiers))
+               for obj in bpy.data.objects}
+    meshes = {me.session_uid: (len(me.vertices), len(me.edges), len(me.loops), len(me.polygons),
+                               len(me.materials), len(me.attributes), me.has_custom_normals)
+              for me in bpy.data.meshes}
+    return ids, objects, meshes
+
+def changed_count(before, after):
+    """前后都存在且签名不同的条目数量"""
+    return sum(1 for key, value in after.items() if key in before and before[key] != value)
+
+def operator_properties(op):
+    return {prop.identifier: getattr(op, prop.identifier) for prop in op.bl_rna.properties
+            if prop.identifier != 'rna_type'}
+
+def record_profile(op, result, elapsed, selected, before, profiler=None):
+    """写入一条性能记录：耗时、改动数量与可选的 cProfile 结果"""
+    after = data_snapshot()
+    record = {
+        'time': time.time(),
+        'file': bpy.data.filepath,
+        'operator': op.bl_idname,
+        'label': op.bl_label,
+        'properties': operator_properties(op),
+        'result': sorted(result),
+        'seconds': elapsed,
+        'selected': selected,
+        'objects_total': len(after[1]),
+        'objects_changed': changed_count(before[1], after[1]),
+        'meshes_changed': changed_count(before[2], after[2]),
+        'created': {attr: len(after[0][attr] - before[0][attr]) for attr in PROFILED_DATA},
+        'removed': {attr: len(before[0][attr] - after[0][attr]) for attr in PROFILED_DATA},
+    }
+    if profiler:
+        stream = io.StringIO()
+        pstats.Stats(profiler, stream=stream).sort_stats('cumulative').print_stats(25)
+        record['profile'] = stream.getvalue()
+    profile_records.append(record)
+    del profile_records[:-PROFILE_HISTORY]
+
+def finish_profile(op, result):
+    """模态运行结束（完成或取消）时写入挂起的性能记录，耗时从 execute 开始计算"""
+    pending = getattr(op, "_profile_pending", None)
+    if pending is None:
+        return
+    op._profile_pending = None
+    start, before, selected, profiler = pending
+    record_profile(op, result, time.perf_counter() - start, selected, before, profiler)
+
+def instrument_execute(execute):
+    """包装操作符的 execute：开启性能分析时记录耗时、改动数量与可选的 cProfile 结果
+
+    execute 返回 RUNNING_MODAL 时工作尚未完成，记录挂起到操作符上，由 finish_profile 在模态结束时写入。
+    """
+    @functools.wraps(execute)
+    def wrapper(self, context):
+        if batch_session and type(self) in batch_session['collapsed']:
+            batch_session['operations'] += 1
+        scene = context.scene
+        if scene is None or not scene.at_profiling_enabled:
+            return execute(self, context)
+        before = data_snapshot()
+        selected = len(context.selected_objects)
+        profiler = cProfile.Profile() if scene.at_profiling_cprofile else None
+        result = {'ERROR'}
+        start = time.perf_counter()
+        try:
+            if profiler:
+                result = profiler.runcall(execute, self, context)
+            else:
+                result = execute(self, context)
+            return result
+        finally:
+            if 'RUNNING_MODAL' in result:
+                self._profile_pending = (start, before, selected, profiler)
+            else:
+                record_profile(self, result, time.perf_counter() - start, selected, before, profiler)
+    return wrapper
+
+def instrument_operators(operator_classes):
+    for cls in operator_classes:
+        if not hasattr(cls.execute, '__wrapped__'):
+            cls.execute = instrument_execute(cls.execute)
+
+def restore_operators(operator_classes):
+    for cls in operator_classes:
+        if hasattr(cls.execute, '__wrapped__'):
+            cls.execute = cls.execute.__wrapped__
+
+# ---------------------- 分块执行 ----------------------
+# 每次计时器回调最多占用的时间（秒），其余时间留给界面刷新
+CHUNK_BUDGET = 0.05
+
+class ChunkedOperator:
+    """可分块执行、可取消的操作符基类，与 bpy.types.Operator 一起继承
+
+    子类实现生成器 steps(context)：每完成一小块工作 yield (已完成, 总数)，
+    可撤销的修改先用 self.add_undo(func, *args) 登记对应的撤销动作，
+    不可撤销的收尾（如批量删除）放在最后一次 yield 之后；生成器的返回值即操作符结果。
+    从界面调用（invoke）时由计时器驱动，每次最多运行 CHUNK_BUDGET 秒并更新进度，
+    按 ESC 逆序执行撤销动作后取消；脚本或后台调用 execute 时一次性同步运行。
+    """
+    def invoke(self, context, event):
+        self._interactive = True
+        return self.execute(context)
+
+    def add_undo(self, func, *args):
+        self._undo.append((func, args))
+
+    def execute(self, context):
+        self._undo = []
+        self._steps = self.steps(context)
+        if getattr(self, "_interactive", False) and not bpy.app.background and context.window is not None:
+            return self.start_modal(context)
+        while True:
+            try:
+                next(self._steps)
+            except StopIteration as stop:
+                return stop.value or {'FINISHED'}
+
+    def start_modal(self, context):
+        wm = context.window_manager
+        self._timer = wm.event_timer_add(0.01, window=context.window)
+        wm.modal_handler_add(self)
+        wm.progress_begin(0, 100)
+        return {'RUNNING_MODAL'}
+
+    def stop_modal(self, context, result):
+        """结束模态运行并返回 result；开启性能分析时在此写入整个运行的记录"""
+        wm = context.window_manager
+        wm.event_timer_remove(self._timer)
+        wm.progress_end()
+        context.workspace.status_text_set(None)
+        finish_profile(self, result)
+        return result
+
+    def rollback(self):
+        """逆序执行登记的撤销动作，返回失败数量"""
+        failed = 0
+        for func, args in reversed(self._undo):
+            try:
+                func(*args)
+            except Exception:
+                failed += 1
+        self._undo.clear()
+        return failed
+
+    def modal(self, context, event):
+        if event.type == 'ESC':
+            failed = self.rollback()
+            self.report({'WARNING'}, f"{self.bl_label} 已取消，修改已撤销" + (f"（{failed} 项无法恢复）" if failed else ""))
+            return self.stop_modal(context, {'CANCELLED'})
+        if event.type != 'TIMER':
+            # 执行期间屏蔽其他输入，防止用户修改正在处理的数据
+            return {'RUNNING_MODAL'}
+        deadline = time.perf_counter() + CHUNK_BUDGET
+        done, total = 0, 1
+        pending = getattr(self, "_profile_pending", None)
+        profiler = pending[3] if pending else None
+        if profiler:
+            profiler.enable()
+        try:
+            while time.perf_counter() < deadline:
+                done, total = next(self._steps)
+        except StopIteration as stop:
+            if profiler:
+                profiler.disable()
+            return self.stop_modal(context, stop.value or {'FINISHED'})
+        except Exception as e:
+            if profiler:
+                profiler.disable()
+            self.rollback()
+            self.report({'ERROR'}, f"{self.bl_label} 出错，修改已撤销: {str(e)}")
+            return self.stop_modal(context, {'CANCELLED'})
+        if profiler:
+            profiler.disable()
+        percent = int(100 * done / max(total, 1))
+        context.window_manager.progress_update(percent)
+        context.workspace.status_text_set(f"{self.bl_label}: {done}/{total} ({percent}%)  按 ESC 取消")
+        return {'RUNNING_MODAL'}
+
+# ---------------------- 批处理会话 ----------------------
+# 进行中的批处理会话状态（未开始时为空字典）
+batch_session = {}
+
+def process_memory():
+    """当前进程常驻内存（字节）；优先使用 psutil，其次读取 /proc，都不可用时返回 None"""
+    if psutil is not None:
+        return psutil.Process().memory_info().rss
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        return None
+
+def timed_undo_push(message):
+    """写入一个撤销步骤，返回 (耗时秒数, 内存增量字节或 None)"""
+    memory_before = process_memory()
+    start = time.perf_counter()
+    bpy.ops.ed.undo_push(message=message)
+    elapsed = time.perf_counter() - start
+    memory_after = process_memory()
+    if memory_before is None or memory_after is None:
+        return elapsed, None
+    return elapsed, max(memory_after - memory_before, 0)
+
+def set_operator_undo(operator_classes, enabled):
+    """重新注册操作符以增删 'UNDO' 选项（bl_options 只在注册时读取）"""
+    for cls in operator_classes:
+        options = set(cls.bl_options)
+        if enabled:
+            options.add('UNDO')
+        else:
+            options.discard('UNDO')
+        bpy.utils.unregister_class(cls)
+        cls.bl_options = options
+        bpy.utils.register_class(cls)
+
+def session_savings():
+    """估算已节省的 (秒数, 字节或 None)：会话开始时实测的单次撤销写入开销 × 会话内操作次数
+
+    实际开销随场景大小变化，结果只是估算值，界面与报告中均标注为“估算”。
+    """
+    count = batch_session['operations']
+    memory = batch_session['push_memory']
+    return count * batch_session['push_seconds'], None if memory is None else count * memory
+
+def end_batch_session():
+    """恢复撤销设置并清空会话状态，返回结束前的会话状态"""
+    session = dict(batch_session)
+    batch_session.clear()
+    set_operator_undo(session['collapsed'], True)
+    preferences = bpy.context.preferences
+    if session['global_undo'] is not None:
+        preferences.edit.use_global_undo = session['global_undo']
+        preferences.use_preferences_save = session['preferences_save']
+    return session
+
+@bpy.app.handlers.persistent
+def end_session_on_load(_dummy=None):
+    """打开其他文件前结束进行中的会话，恢复撤销设置"""
+    if batch_session:
+        end_batch_session()
 
 # ---------------------- 核心功能 (包含所有修正和新增) ----------------------
 class OBJECT_OT_join_with_pregroups(bpy.types.Operator):
@@ -20,17 +1548,73 @@ class OBJECT_OT_join_with_pregroups(bpy.types.Operator):
     bl_idname = "object.join_with_pregroups"
     bl_label = "合并并保留顶点组"
     bl_options = {'REGISTER', 'UNDO'}
+    method: bpy.props.EnumProperty(
+        name="合并方式",
+        items=[
+            ('BULK', "批量数组", "直接拼接网格数组，适合上万部件的大规模合并"),
+            ('OPERATOR', "内置合并", "逐物体填充顶点组后调用 bpy.ops.object.join（旧方式）"),
+        ],
+        default='BULK',
+        description="选择合并实现方式"
+    )
+    part_mode: bpy.props.EnumProperty(
+        name="部件记录",
+        items=[
+            ('GROUPS', "顶点组", "每个源物体一个同名顶点组（旧方式）"),
+            ('ATTRIBUTE', "部件 ID 属性", "每个面记录一个整数部件 ID，部件名存于网格自定义属性，适合上千部件"),
+        ],
+        default='GROUPS',
+        description="选择合并后如何记录每个面来自哪个源物体"
+    )
     def execute(self, context):
         selected_objects = context.selected_objects.copy()
         if len(selected_objects) < 2:
             self.report({'WARNING'}, "请至少选中两个对象！")
             return {'CANCELLED'}
-        for obj in selected_objects:
-            if obj.type == 'MESH':
+        start_time = time.perf_counter()
+        mesh_objects = [obj for obj in selected_objects if obj.type == 'MESH']
+        method = self.method
+        # 形态键无法按数组拼接，回退到内置合并
+        if method == 'BULK' and any(obj.data.shape_keys for obj in mesh_objects):
+            self.report({'WARNING'}, "存在形态键，已改用内置合并。")
+            method = 'OPERATOR'
+        if method == 'BULK':
+            if len(mesh_objects) < 2:
+                self.report({'WARNING'}, "请至少选中两个网格对象！")
+                return {'CANCELLED'}
+            if context.mode != 'OBJECT':
+                bpy.ops.object.mode_set(mode='OBJECT')
+            target = context.active_object if context.active_object in mesh_objects else mesh_objects[0]
+            use_attribute = self.part_mode == 'ATTRIBUTE'
+            bulk_join_meshes(target, mesh_objects, part_groups=not use_attribute, part_attribute=use_attribute)
+            target.select_set(True)
+            context.view_layer.objects.active = target
+        elif self.part_mode == 'ATTRIBUTE':
+            # 内置合并会按名称拼接面属性，先为每个网格写入各自的部件 ID；
+            # 已合并过的源网格与 BULK 路径一样按其部件表偏移展开
+            names = []
+            for obj in mesh_objects:
+                if obj.data.users > 1:
+                    obj.data = obj.data.copy()
+                me = obj.data
+                table = part_table(me)
+                if table is None:
+                    write_part_table(me, np.full(len(me.polygons), len(names), dtype=np.int32), [])
+                    names.append(obj.name)
+                else:
+                    write_part_table(me, table[0] + len(names), [])
+                    names.extend(table[1])
+            bpy.ops.object.join()
+            joined = context.active_object.data
+            joined[PART_NAMES_PROPERTY] = json.dumps(names, ensure_ascii=False)
+        else:
+            for obj in mesh_objects:
                 vg = obj.vertex_groups.new(name=obj.name)
                 vg.add(range(len(obj.data.vertices)), 1.0, 'REPLACE')
-        bpy.ops.object.join()
-        self.report({'INFO'}, "合并完成！顶点组已保留。")
+            bpy.ops.object.join()
+        elapsed = time.perf_counter() - start_time
+        kept = "部件 ID 已写入" if self.part_mode == 'ATTRIBUTE' else "顶点组已保留"
+        self.report({'INFO'}, f"合并完成！{kept}。({len(mesh_objects)} 个对象, 用时 {elapsed:.2f} 秒)")
         return {'FINISHED'}
 
 class OBJECT_OT_select_vertex_group_elements(bpy.types.Operator):
@@ -38,73 +1622,208 @@ class OBJECT_OT_select_vertex_group_elements(bpy.types.Operator):
     bl_idname = "object.select_vertex_group_elements"
     bl_label = "选择顶点组面"
     bl_options = {'REGISTER', 'UNDO'}
+    rebuild_index: bpy.props.BoolProperty(
+        name="重建索引",
+        default=False,
+        description="忽略缓存，重新读取顶点组归属（仅修改了权重而拓扑未变时使用）"
+    )
     @classmethod
     def poll(cls, context):
         return context.active_object and context.active_object.type == 'MESH'
     def execute(self, context):
         obj = context.active_object
-        if obj.mode != 'EDIT':
+        me = obj.data
+        # 回到物体模式以同步编辑数据，之后全部使用数组读写
+        bpy.ops.object.mode_set(mode='OBJECT')
+        vert_idx, group_idx, _weights = vertex_group_index(obj, self.rebuild_index)
+        if not len(group_idx):
             bpy.ops.object.mode_set(mode='EDIT')
-        bm = bmesh.from_edit_mesh(obj.data)
-        deform_layer = bm.verts.layers.deform.active
-        if not deform_layer:
             self.report({'WARNING'}, "没有顶点组数据！")
             return {'CANCELLED'}
-        target_indices = set()
+        nv, ne, nf, nl = len(me.vertices), len(me.edges), len(me.polygons), len(me.loops)
+        loop_verts = read_array(me.loops, "vertex_index", nl, np.int32)
+        loop_edges = read_array(me.loops, "edge_index", nl, np.int32)
+        loop_starts = read_array(me.polygons, "loop_start", nf, np.int32)
+        loop_totals = read_array(me.polygons, "loop_total", nf, np.int32)
         select_mode = context.tool_settings.mesh_select_mode
-        # 根据不同的选择模式，获取选中元素所属的顶点组索引
+        # 根据不同的选择模式，得到被选元素涉及的顶点
         if select_mode[0]:
-            for v in bm.verts:
-                if v.select:
-                    target_indices.update(v[deform_layer].keys())
+            vert_sel = read_array(me.vertices, "select", nv, bool)
         elif select_mode[1]:
-            for e in bm.edges:
-                if e.select:
-                    for v in e.verts:
-                        target_indices.update(v[deform_layer].keys())
-        elif select_mode[2]:
-            for f in bm.faces:
-                if f.select:
-                    for v in f.verts:
-                        target_indices.update(v[deform_layer].keys())
-        if not target_indices:
+            vert_sel = np.zeros(nv, dtype=bool)
+            edge_sel = read_array(me.edges, "select", ne, bool)
+            edge_verts = read_array(me.edges, "vertices", ne * 2, np.int32).reshape(-1, 2)
+            vert_sel[edge_verts[edge_sel].ravel()] = True
+        else:
+            vert_sel = np.zeros(nv, dtype=bool)
+            face_sel = read_array(me.polygons, "select", nf, bool)
+            vert_sel[loop_verts[np.repeat(face_sel, loop_totals)]] = True
+        # 筛选出合法的顶点组索引（防止因权重数据异常而超出范围）
+        target_groups = np.unique(group_idx[vert_sel[vert_idx]])
+        target_groups = target_groups[target_groups < len(obj.vertex_groups)]
+        if not len(target_groups):
+            bpy.ops.object.mode_set(mode='EDIT')
             self.report({'WARNING'}, "未找到关联顶点组！")
             return {'CANCELLED'}
-        # 筛选出合法的顶点组索引（防止因权重数据异常而超出范围）
-        target_indices = {vg_idx for vg_idx in target_indices if vg_idx < len(obj.vertex_groups)}
-        bpy.ops.mesh.select_all(action='DESELECT')
-        # 遍历所有面，检查是否存在一个目标顶点组，使得面上所有顶点均属于该顶点组
-        for f in bm.faces:
-            for vg_idx in target_indices:
-                if all(vg_idx in v[deform_layer] for v in f.verts):
-                    f.select = True
-                    break  # 一个顶点组满足条件即可
-        bmesh.update_edit_mesh(obj.data)
-        self.report({'INFO'}, f"已选择 {len(target_indices)} 个顶点组对应的面")
+        # 每个顶点对目标顶点组的归属用位集表示
+        column = np.full(max(len(obj.vertex_groups), int(group_idx.max()) + 1), -1, dtype=np.int64)
+        column[target_groups] = np.arange(len(target_groups))
+        member = column[group_idx] >= 0
+        cols = column[group_idx[member]]
+        bits = np.zeros((nv, (len(target_groups) + 63) // 64), dtype=np.uint64)
+        np.bitwise_or.at(bits, (vert_idx[member], cols // 64),
+                         np.left_shift(np.uint64(1), (cols % 64).astype(np.uint64)))
+        # 候选面：所有顶点都至少属于一个目标顶点组
+        in_any = bits.any(axis=1)
+        candidates = np.zeros(nf, dtype=bool)
+        if nf:
+            candidates = np.logical_and.reduceat(in_any[loop_verts], loop_starts)
+        cand_faces = np.flatnonzero(candidates)
+        # 面位集 = 面上所有顶点位集按位与；非零即存在一个包含全部顶点的顶点组
+        face_sel = np.zeros(nf, dtype=bool)
+        if len(cand_faces):
+            cand_loops = np.repeat(candidates, loop_totals)
+            cand_starts = np.concatenate(([0], np.cumsum(loop_totals[cand_faces])[:-1]))
+            face_bits = np.bitwise_and.reduceat(bits[loop_verts[cand_loops]], cand_starts, axis=0)
+            face_sel[cand_faces] = face_bits.any(axis=1)
+        loop_sel = np.repeat(face_sel, loop_totals)
+        vert_sel = np.zeros(nv, dtype=bool)
+        vert_sel[loop_verts[loop_sel]] = True
+        edge_sel = np.zeros(ne, dtype=bool)
+        edge_sel[loop_edges[loop_sel]] = True
+        me.vertices.foreach_set("select", vert_sel)
+        me.edges.foreach_set("select", edge_sel)
+        me.polygons.foreach_set("select", face_sel)
+        bpy.ops.object.mode_set(mode='EDIT')
+        self.report({'INFO'}, f"已选择 {len(target_groups)} 个顶点组对应的面")
+        return {'FINISHED'}
+
+class OBJECT_OT_part_elements(bpy.types.Operator):
+    """根据部件 ID 属性选择、隐藏或分离当前选中元素所在的部件"""
+    bl_idname = "object.part_elements"
+    bl_label = "按部件处理"
+    bl_options = {'REGISTER', 'UNDO'}
+    action: bpy.props.EnumProperty(
+        name="操作",
+        items=[
+            ('SELECT', "选择部件", "选择当前选中元素所在部件的全部面"),
+            ('HIDE', "隐藏部件", "隐藏当前选中元素所在的部件"),
+            ('SEPARATE', "分离部件", "把当前选中元素所在的部件分离为独立物体（以部件名命名）"),
+        ],
+        default='SELECT',
+        description="对选中部件执行的操作"
+    )
+    @classmethod
+    def poll(cls, context):
+        obj = context.active_object
+        return obj and obj.type == 'MESH' and PART_ATTRIBUTE in obj.data.attributes
+    def execute(self, context):
+        start_time = time.perf_counter()
+        obj = context.active_object
+        me = obj.data
+        original_mode = context.mode
+        # 回到物体模式以同步编辑数据，之后全部使用数组读写
+        bpy.ops.object.mode_set(mode='OBJECT')
+        table = part_table(me)
+        if table is None:
+            self.report({'WARNING'}, "网格缺少部件名表！")
+            return {'CANCELLED'}
+        part_ids, names = table
+        nv, ne, nf, nl = len(me.vertices), len(me.edges), len(me.polygons), len(me.loops)
+        loop_verts = read_array(me.loops, "vertex_index", nl, np.int32)
+        loop_edges = read_array(me.loops, "edge_index", nl, np.int32)
+        loop_starts = read_array(me.polygons, "loop_start", nf, np.int32)
+        loop_totals = read_array(me.polygons, "loop_total", nf, np.int32)
+        # 与任一选中顶点相连的面所在的部件即为目标部件
+        vert_sel = read_array(me.vertices, "select", nv, bool)
+        touched = np.zeros(nf, dtype=bool)
+        if nf:
+            touched = np.logical_or.reduceat(vert_sel[loop_verts], loop_starts)
+        target = np.zeros(max(len(names), 1), dtype=bool)
+        target[part_ids[touched]] = True
+        face_mask = target[part_ids]
+        part_count = int(target.sum())
+        if not part_count:
+            if original_mode == 'EDIT_MESH':
+                bpy.ops.object.mode_set(mode='EDIT')
+            self.report({'WARNING'}, "未选中任何部件的元素！")
+            return {'CANCELLED'}
+
+        if self.action == 'SEPARATE':
+            # 标签 0 为其余面（留在原物体），目标部件的标签为 ID + 1
+            labels = np.where(face_mask, part_ids + 1, 0).astype(np.int32)
+            old_mesh = me
+            new_objects = split_mesh_by_faces(obj, labels)
+            if nf and labels.min() > 0:
+                # 所有面都属于目标部件时，最小标签的部件留在原物体上，同样按部件名命名并计数
+                new_objects.insert(0, (int(labels.min()), obj))
+            for label, part in new_objects:
+                part.name = names[label - 1]
+            if old_mesh.users == 0:
+                bpy.data.meshes.remove(old_mesh)
+            message = f"已分离 {len(new_objects)} 个部件"
+        else:
+            if self.action == 'SELECT':
+                face_flags = face_mask
+                prop = "select"
+            else:
+                face_flags = face_mask | read_array(me.polygons, "hide", nf, bool)
+                prop = "hide"
+            # 选择：目标面的顶点/边全部选中；隐藏：只隐藏不再被任何可见面使用的顶点/边
+            loop_flags = np.repeat(face_flags, loop_totals)
+            vert_flags = np.zeros(nv, dtype=bool)
+            vert_flags[loop_verts[loop_flags]] = True
+            edge_flags = np.zeros(ne, dtype=bool)
+            edge_flags[loop_edges[loop_flags]] = True
+            if prop == "hide":
+                vert_flags[loop_verts[~loop_flags]] = False
+                edge_flags[loop_edges[~loop_flags]] = False
+                # 隐藏的元素同时取消选择
+                for collection, flags in ((me.vertices, vert_flags), (me.edges, edge_flags), (me.polygons, face_flags)):
+                    selected = read_array(collection, "select", len(collection), bool)
+                    collection.foreach_set("select", selected & ~flags)
+            me.vertices.foreach_set(prop, vert_flags)
+            me.edges.foreach_set(prop, edge_flags)
+            me.polygons.foreach_set(prop, face_flags)
+            label = "选择" if self.action == 'SELECT' else "隐藏"
+            message = f"已{label} {part_count} 个部件（{int(face_mask.sum())} 个面）"
+        if original_mode == 'EDIT_MESH':
+            bpy.ops.object.mode_set(mode='EDIT')
+        elapsed = time.perf_counter() - start_time
+        self.report({'INFO'}, f"{message}，用时 {elapsed:.2f} 秒")
         return {'FINISHED'}
 
 class OBJECT_OT_split_by_material(bpy.types.Operator):
-    """按材质分离对象"""
+    """按材质分离所有选中对象"""
     bl_idname = "object.split_by_material"
     bl_label = "按材质分离"
     bl_options = {'REGISTER', 'UNDO'}
     @classmethod
     def poll(cls, context):
-        obj = context.active_object
-        return obj and obj.type == 'MESH' and obj.material_slots
+        return any(obj.type == 'MESH' and obj.material_slots for obj in context.selected_objects)
     def execute(self, context):
-        original_active = context.active_object
-        original_mode = original_active.mode
-        if original_mode != 'EDIT':
-            bpy.ops.object.mode_set(mode='EDIT')
-        bpy.ops.mesh.separate(type='MATERIAL')
-        bpy.ops.object.mode_set(mode='OBJECT')
-        bpy.ops.object.select_all(action='DESELECT')
-        original_active.select_set(True)
-        context.view_layer.objects.active = original_active
-        if original_mode == 'EDIT':
+        start_time = time.perf_counter()
+        original_mode = context.mode
+        # 只需同步编辑数据，拆分本身不进入编辑模式
+        if original_mode != 'OBJECT':
+            bpy.ops.object.mode_set(mode='OBJECT')
+        targets = [obj for obj in context.selected_objects if obj.type == 'MESH' and obj.material_slots]
+        old_meshes = {obj.data for obj in targets}
+        split_count = 0
+        new_count = 0
+        for obj in targets:
+            if obj.data.shape_keys:
+                self.report({'WARNING'}, f"{obj.name} 含有形态键，已跳过")
+                continue
+            new_objects = split_mesh_by_material(obj)
+            if new_objects:
+                split_count += 1
+                new_count += len(new_objects)
+        batch_remove_ids([me for me in old_meshes if me.users == 0], bpy.data.meshes)
+        if original_mode == 'EDIT_MESH':
             bpy.ops.object.mode_set(mode='EDIT')
-        self.report({'INFO'}, "已按材质分离（保留默认命名）")
+        elapsed = time.perf_counter() - start_time
+        self.report({'INFO'}, f"已按材质分离 {split_count} 个物体，新建 {new_count} 个物体（保留默认命名），用时 {elapsed:.2f} 秒")
         return {'FINISHED'}
 
 class OBJECT_OT_clean_empty_vertex_groups(bpy.types.Operator):
@@ -116,25 +1835,17 @@ class OBJECT_OT_clean_empty_vertex_groups(bpy.types.Operator):
     def poll(cls, context):
         return any(obj.type == 'MESH' for obj in context.selected_objects)
     def execute(self, context):
+        start_time = time.perf_counter()
         total_removed = 0
+        scanned = set()
         for obj in context.selected_objects:
-            if obj.type != 'MESH' or not obj.vertex_groups:
+            if obj.type != 'MESH' or not obj.vertex_groups or obj.data in scanned:
                 continue
-            bm = bmesh.new()
-            bm.from_mesh(obj.data)
-            deform_layer = bm.verts.layers.deform.active
-            used_groups = set()
-            if deform_layer:
-                for v in bm.verts:
-                    used_groups.update(v[deform_layer].keys())
-            removed = 0
-            for vg in reversed(obj.vertex_groups):
-                if vg.index not in used_groups:
-                    obj.vertex_groups.remove(vg)
-                    removed += 1
-            bm.free()
-            total_removed += removed
-        self.report({'INFO'}, f"总计清理 {total_removed} 个空顶点组")
+            # 共享网格只扫描一次
+            scanned.add(obj.data)
+            total_removed += remove_unused_vertex_groups(obj)
+        elapsed = time.perf_counter() - start_time
+        self.report({'INFO'}, f"总计清理 {total_removed} 个空顶点组（{len(scanned)} 个网格, 用时 {elapsed:.2f} 秒）")
         return {'FINISHED'}
 
 class OBJECT_OT_rename_to_collection(bpy.types.Operator):
@@ -142,32 +1853,27 @@ class OBJECT_OT_rename_to_collection(bpy.types.Operator):
     bl_idname = "object.rename_to_collection"
     bl_label = "按集合重命名"
     bl_options = {'REGISTER', 'UNDO'}
+    unshare_data: bpy.props.BoolProperty(
+        name="拆分共享数据",
+        default=False,
+        description="为共享网格的物体复制独立数据，使每个数据名都与物体名一致（会增加内存占用）"
+    )
     @classmethod
     def poll(cls, context):
         return context.selected_objects
     def execute(self, context):
-        collection_groups = defaultdict(list)
-        renamed_count = 0
-        for obj in context.selected_objects:
-            if obj.users_collection:
-                coll_name = obj.users_collection[0].name
-            else:
-                coll_name = "未分类"
-            collection_groups[coll_name].append(obj)
-        for coll_name, objs in collection_groups.items():
-            for idx, obj in enumerate(objs, 1):
-                new_name = f"{coll_name}_{idx:03d}"
-                try:
-                    if obj.data:
-                        if obj.data.users > 1:
-                            obj.data = obj.data.copy()
-                        obj.data.name = new_name
-                    obj.name = new_name
-                    renamed_count += 1
-                except Exception as e:
-                    self.report({'ERROR'}, f"重命名失败: {str(e)}")
-                    continue
-        self.report({'INFO'}, f"成功重命名 {renamed_count} 个物体")
+        start_time = time.perf_counter()
+        # 第一阶段：计算完整的目标名称表
+        object_names, data_names, copied_count = collection_rename_plan(context.selected_objects, self.unshare_data)
+        # 第二阶段：两遍批量重命名，避免与旧名冲突产生 .001 级联
+        try:
+            bulk_rename(data_names)
+            renamed_count = bulk_rename(object_names)
+        except Exception as e:
+            self.report({'ERROR'}, f"重命名失败: {str(e)}")
+            return {'CANCELLED'}
+        elapsed = time.perf_counter() - start_time
+        self.report({'INFO'}, f"成功重命名 {renamed_count} 个物体，复制 {copied_count} 个共享数据，用时 {elapsed:.2f} 秒")
         return {'FINISHED'}
 
 class OBJECT_OT_select_non_uniform_scale(bpy.types.Operator):
@@ -186,29 +1892,179 @@ class OBJECT_OT_select_non_uniform_scale(bpy.types.Operator):
     def poll(cls, context):
         return context.mode == 'OBJECT'
     def execute(self, context):
-        for obj in context.view_layer.objects:
+        for obj in context.selected_objects:
             obj.select_set(False)
-        selected_count = 0
-        for obj in context.scene.objects:
-            if (abs(obj.scale.x - 1.0) > self.tolerance or 
-                abs(obj.scale.y - 1.0) > self.tolerance or 
-                abs(obj.scale.z - 1.0) > self.tolerance):
-                obj.select_set(True)
-                selected_count += 1
+        if abs(self.tolerance - INDEX_SCALE_TOLERANCE) < 1e-9:
+            # 默认容差直接使用场景索引，只遍历命中的物体
+            matches = scene_attribute_index(context.scene).objects_with_non_unit_scale(context.scene)
+        else:
+            objects = context.scene.objects
+            non_unit = (np.abs(read_scales(objects) - 1.0) > self.tolerance).any(axis=1)
+            matches = [obj for obj, flag in zip(objects, non_unit.tolist()) if flag]
+        for obj in matches:
+            obj.select_set(True)
+        selected_count = len(matches)
         self.report({'INFO'}, f"已选择 {selected_count} 个非常规缩放物体")
         return {'FINISHED'}
 
+class OBJECT_OT_audit_scene(bpy.types.Operator):
+    """检查场景中所有物体的导出问题（缩放、旋转、零尺寸、多边形面、松散顶点、零面积面）"""
+    bl_idname = "object.audit_scene"
+    bl_label = "导出检查"
+    bl_options = {'REGISTER'}
+    tolerance: bpy.props.FloatProperty(
+        name="容差",
+        default=0.001,
+        min=0.0001,
+        max=1.0,
+        description="允许的误差范围"
+    )
+    @classmethod
+    def poll(cls, context):
+        return context.mode == 'OBJECT'
+    def execute(self, context):
+        start_time = time.perf_counter()
+        results = audit_scene(context.scene, self.tolerance)
+        audit_results[context.scene.name] = results
+        elapsed = time.perf_counter() - start_time
+        summary = "，".join(f"{label} {len(results[key])}" for key, label, _ in AUDIT_CATEGORIES)
+        self.report({'INFO'}, f"检查完成（{len(context.scene.objects)} 个物体，用时 {elapsed:.2f} 秒）：{summary}")
+        return {'FINISHED'}
+
+class OBJECT_OT_select_audit_category(bpy.types.Operator):
+    """选择最近一次导出检查中属于指定类别的物体"""
+    bl_idname = "object.select_audit_category"
+    bl_label = "选择检查结果"
+    bl_options = {'REGISTER', 'UNDO'}
+    category: bpy.props.EnumProperty(
+        name="类别",
+        items=AUDIT_CATEGORIES,
+        description="要选择的问题类别"
+    )
+    @classmethod
+    def poll(cls, context):
+        return context.mode == 'OBJECT' and context.scene.name in audit_results
+    def execute(self, context):
+        names = audit_results[context.scene.name].get(self.category, [])
+        selected_count = select_objects_by_name(context, names)
+        self.report({'INFO'}, f"已选择 {selected_count} 个物体")
+        return {'FINISHED'}
+
+class OBJECT_OT_find_coincident_duplicates(bpy.types.Operator):
+    """查找场景中位置与几何完全重合的重复网格物体，选择或删除多余的副本"""
+    bl_idname = "object.find_coincident_duplicates"
+    bl_label = "查找重合重复物体"
+    bl_options = {'REGISTER', 'UNDO'}
+    action: bpy.props.EnumProperty(
+        name="处理方式",
+        items=[
+            ('SELECT', "选择", "只选择多余的副本（每组保留名称最靠前的一个）"),
+            ('DELETE', "删除", "直接删除多余的副本"),
+        ],
+        default='SELECT',
+        description="找到重复物体后的处理方式"
+    )
+    tolerance: bpy.props.FloatProperty(
+        name="容差",
+        default=0.0001,
+        min=0.0000001,
+        precision=6,
+        description="判断重合时允许的最大位置偏差"
+    )
+    @classmethod
+    def poll(cls, context):
+        return context.mode == 'OBJECT'
+    def execute(self, context):
+        start_time = time.perf_counter()
+        objects = [obj for obj in context.scene.objects if obj.type == 'MESH']
+        duplicates = find_coincident_duplicates(objects, self.tolerance)
+        if self.action == 'DELETE':
+            meshes = {obj.data for obj in duplicates}
+            removed_count = batch_remove_ids(duplicates, bpy.data.objects)
+            batch_remove_ids([me for me in meshes if me.users == 0], bpy.data.meshes)
+            message = f"已删除 {removed_count} 个重合的重复物体"
+        else:
+            select_objects_by_name(context, [obj.name for obj in duplicates])
+            message = f"已选择 {len(duplicates)} 个重合的重复物体"
+        elapsed = time.perf_counter() - start_time
+        self.report({'INFO'}, f"{message}（检查 {len(objects)} 个网格物体，用时 {elapsed:.2f} 秒）")
+        return {'FINISHED'}
+
 class OBJECT_OT_triangulate_objects(bpy.types.Operator):
-    """为所有选中物体添加三角化修改器"""
+    """为所有选中物体添加三角化修改器，或直接将三角化写入网格数据"""
     bl_idname = "object.triangulate_objects"
     bl_label = "添加三角化"
     bl_options = {'REGISTER', 'UNDO'}
+    mode: bpy.props.EnumProperty(
+        name="方式",
+        items=[
+            ('MODIFIER', "添加修改器", "添加三角化修改器（非破坏，但每次求值都会重新计算）"),
+            ('APPLY', "直接三角化", "将三角化写入网格数据并移除三角化修改器，保留自定义法线"),
+        ],
+        default='MODIFIER',
+        description="选择三角化方式"
+    )
     def execute(self, context):
-        for obj in context.selected_objects:
-            if obj.type == 'MESH':
+        start_time = time.perf_counter()
+        mesh_objects = [obj for obj in context.selected_objects if obj.type == 'MESH']
+        # 每个网格只检查一次是否已全部为三角面
+        triangulated = {}
+        for me in {obj.data for obj in mesh_objects}:
+            triangulated[me] = is_triangulated(me)
+        if self.mode == 'MODIFIER':
+            added_count = 0
+            for obj in mesh_objects:
+                if triangulated[obj.data] or any(mod.type == 'TRIANGULATE' for mod in obj.modifiers):
+                    continue
                 modifier = obj.modifiers.new(name="Triangulate", type='TRIANGULATE')
                 modifier.keep_custom_normals = True
-        self.report({'INFO'}, "已添加三角化修改器")
+                added_count += 1
+            self.report({'INFO'}, f"已添加 {added_count} 个三角化修改器，跳过 {len(mesh_objects) - added_count} 个已三角化物体")
+            return {'FINISHED'}
+
+        prev_mode = context.mode
+        if prev_mode != 'OBJECT':
+            bpy.ops.object.mode_set(mode='OBJECT')
+        # 只有三角化修改器位于修改器栈首位（忽略未启用的修改器）时，烘焙到网格并移除修改器才与原结果一致；
+        # 三角化修改器排在细分、倒角、镜像等之后的物体跳过，共享该网格的其他物体也不烘焙
+        modifiers = {}
+        blocked = []
+        for obj in mesh_objects:
+            enabled = [mod for mod in obj.modifiers if mod.show_viewport]
+            if not any(mod.type == 'TRIANGULATE' for mod in enabled):
+                continue
+            if enabled[0].type != 'TRIANGULATE':
+                blocked.append(obj)
+                continue
+            modifiers[obj] = enabled[0]
+        blocked_meshes = {obj.data for obj in blocked}
+        # 网格按修改器的设置烘焙（共享网格取第一个使用者的修改器）
+        settings = {}
+        for obj, mod in modifiers.items():
+            settings.setdefault(obj.data, mod)
+        baked = set()
+        for me, done in triangulated.items():
+            if done or me.library is not None or me in blocked_meshes:
+                continue
+            triangulate_mesh(me, settings.get(me))
+            baked.add(me)
+        baked_count = len(baked)
+        # 数据已三角化，首位的修改器只会增加求值开销；未能烘焙的网格（如链接库网格）保留修改器
+        removed_count = 0
+        for obj, mod in modifiers.items():
+            if obj.data in baked or triangulated[obj.data]:
+                obj.modifiers.remove(mod)
+                removed_count += 1
+        if prev_mode == 'EDIT_MESH':
+            bpy.ops.object.mode_set(mode='EDIT')
+        elapsed = time.perf_counter() - start_time
+        message = (f"已三角化 {baked_count} 个网格（跳过 {len(triangulated) - baked_count} 个），"
+                   f"移除 {removed_count} 个三角化修改器，用时 {elapsed:.2f} 秒")
+        if blocked:
+            self.report({'WARNING'}, f"{message}；{len(blocked)} 个物体的三角化修改器不在修改器栈首位，"
+                                     f"已跳过（如 {blocked[0].name}）")
+        else:
+            self.report({'INFO'}, message)
         return {'FINISHED'}
 
 class OBJECT_OT_remove_triangulate(bpy.types.Operator):
@@ -236,37 +2092,160 @@ class OBJECT_OT_clear_custom_normals(bpy.types.Operator):
     def poll(cls, context):
         return any(obj.type == 'MESH' for obj in context.selected_objects)
     def execute(self, context):
-        cleared_count = 0
-        original_active = context.active_object
+        start_time = time.perf_counter()
+        prev_mode = context.mode
+        if prev_mode != 'OBJECT':
+            bpy.ops.object.mode_set(mode='OBJECT')
         selected_objects = context.selected_objects.copy()
-        # 使用临时上下文覆盖进行批量处理
-        for obj in selected_objects:
-            if obj.type != 'MESH':
-                continue
+        # 共享网格只处理一次；先用 has_custom_normals 廉价跳过没有自定义法线的网格
+        meshes = {obj.data for obj in selected_objects if obj.type == 'MESH'}
+        targets = [me for me in meshes if me.has_custom_normals]
+        cleared_count = 0
+        for me in targets:
             try:
-                # 创建临时上下文
-                override = {
-                    'active_object': obj,
-                    'object': obj,
-                    'selected_objects': [obj]
-                }
-                # 直接调用清除操作符
-                with context.temp_override(**override):
+                if clear_custom_normals(me):
+                    cleared_count += 1
+                    continue
+                # 自定义法线不是通用属性的旧版本，退回到操作符
+                user = next(obj for obj in selected_objects if obj.data == me)
+                with context.temp_override(active_object=user, object=user, selected_objects=[user]):
                     bpy.ops.mesh.customdata_custom_splitnormals_clear()
                 cleared_count += 1
-                # 兼容处理：清除残留数据
-                if hasattr(obj.data, "use_auto_smooth"):
-                    obj.data.use_auto_smooth = False
-                if hasattr(obj.data, "has_custom_normals"):
-                    obj.data.has_custom_normals = False
             except Exception as e:
-                self.report({'WARNING'}, f"处理 {obj.name} 失败: {str(e)}")
+                self.report({'WARNING'}, f"处理 {me.name} 失败: {str(e)}")
                 continue
-        # 恢复原始上下文
-        context.view_layer.objects.active = original_active
-        for obj in selected_objects:
-            obj.select_set(True)
-        self.report({'INFO'}, f"已清除 {cleared_count}/{len(selected_objects)} 个物体的拆边法线")
+        # 所有网格处理完后统一更新一次依赖图
+        context.view_layer.update()
+        if prev_mode == 'EDIT_MESH':
+            bpy.ops.object.mode_set(mode='EDIT')
+        elapsed = time.perf_counter() - start_time
+        self.report({'INFO'}, f"已清除 {cleared_count}/{len(meshes)} 个网格的拆边法线（用时 {elapsed:.2f} 秒）")
+        return {'FINISHED'}
+
+class OBJECT_OT_weld_vertices(bpy.types.Operator):
+    """合并所有选中网格中距离在容差内的重复顶点（不进入编辑模式）"""
+    bl_idname = "object.weld_vertices"
+    bl_label = "批量焊接顶点"
+    bl_options = {'REGISTER', 'UNDO'}
+    tolerance: bpy.props.FloatProperty(
+        name="合并距离",
+        default=0.0001,
+        min=0.0000001,
+        precision=6,
+        description="距离不超过该值的顶点将被合并"
+    )
+    @classmethod
+    def poll(cls, context):
+        return any(obj.type == 'MESH' for obj in context.selected_objects)
+    def execute(self, context):
+        start_time = time.perf_counter()
+        original_mode = context.mode
+        if original_mode != 'OBJECT':
+            bpy.ops.object.mode_set(mode='OBJECT')
+        # 共享网格只焊接一次；网格的全部使用者只扫描一次场景
+        targets = {}
+        for obj in context.selected_objects:
+            if obj.type == 'MESH' and obj.data not in targets:
+                targets[obj.data] = obj
+        users = defaultdict(list)
+        for obj in bpy.data.objects:
+            if obj.data in targets:
+                users[obj.data].append(obj)
+        old_meshes = []
+        before_total = after_total = 0
+        slowest = (0.0, "")
+        for me, obj in targets.items():
+            if me.shape_keys:
+                self.report({'WARNING'}, f"{obj.name} 含有形态键，已跳过")
+                continue
+            mesh_start = time.perf_counter()
+            before, after = weld_mesh(obj, self.tolerance, users[me])
+            before_total += before
+            after_total += after
+            if after != before:
+                old_meshes.append((me, obj.data))
+            slowest = max(slowest, (time.perf_counter() - mesh_start, me.name))
+        # 删除旧网格后新网格沿用原名称
+        names = {new_me: me.name for me, new_me in old_meshes}
+        batch_remove_ids([me for me, _ in old_meshes], bpy.data.meshes)
+        bulk_rename(names)
+        if original_mode == 'EDIT_MESH':
+            bpy.ops.object.mode_set(mode='EDIT')
+        elapsed = time.perf_counter() - start_time
+        self.report({'INFO'}, f"已焊接 {len(old_meshes)}/{len(targets)} 个网格，顶点 {before_total} -> {after_total}"
+                              f"（减少 {before_total - after_total}，用时 {elapsed:.2f} 秒，"
+                              f"最慢 {slowest[1]} {slowest[0]:.2f} 秒）")
+        return {'FINISHED'}
+
+class OBJECT_OT_instance_duplicate_meshes(bpy.types.Operator):
+    """把几何相同、仅位置或旋转不同的网格替换为同一份共享网格数据"""
+    bl_idname = "object.instance_duplicate_meshes"
+    bl_label = "重复网格实例化"
+    bl_options = {'REGISTER', 'UNDO'}
+    tolerance: bpy.props.FloatProperty(
+        name="容差",
+        default=0.0001,
+        min=0.0000001,
+        precision=6,
+        description="判断两个网格相同时允许的最大顶点偏差"
+    )
+    @classmethod
+    def poll(cls, context):
+        return any(obj.type == 'MESH' for obj in context.selected_objects)
+    def execute(self, context):
+        start_time = time.perf_counter()
+        if context.mode != 'OBJECT':
+            bpy.ops.object.mode_set(mode='OBJECT')
+        tolerance = self.tolerance
+        # 网格的所有使用者（包括未选中的）都要一起改链接和矩阵
+        users = defaultdict(list)
+        for obj in bpy.data.objects:
+            if obj.type == 'MESH':
+                users[obj.data].append(obj)
+        meshes = {obj.data for obj in context.selected_objects if obj.type == 'MESH'}
+        candidates = sorted((me for me in meshes if len(me.vertices) and not me.shape_keys and not me.library),
+                            key=lambda me: me.name)
+        buckets = defaultdict(list)  # 几何哈希 -> [(共享网格, 去质心坐标, 质心)]
+        replaced = []
+        relinked_count = 0
+        for me in candidates:
+            owners = users[me]
+            key, centered, centroid = geometry_key(owners[0], tolerance)
+            # 自定义法线与非等比缩放下旋转会改变结果，只允许平移
+            translation_only = me.has_custom_normals or any(
+                max(obj.scale) - min(obj.scale) > 1e-6 for obj in owners)
+            # 修改器（镜像、阵列、晶格等依赖物体原点或其他物体）、约束与变换动画下不能移动物体原点，
+            # 只接受无需修正矩阵即可直接共享的网格
+            pinned = any(mod.type != 'TRIANGULATE' for obj in owners for mod in obj.modifiers) or any(
+                len(obj.constraints) or has_transform_animation(obj) for obj in owners)
+            match = None
+            for source, source_centered, source_centroid in buckets[key]:
+                rotation, residual = rigid_rotation(source_centered, centered)
+                if residual > tolerance:
+                    continue
+                identity = np.allclose(rotation, np.eye(3), atol=1e-6)
+                if translation_only and not identity:
+                    continue
+                if pinned and not (identity and np.allclose(source_centroid, centroid, atol=tolerance)):
+                    continue
+                match = (source, rotation, source_centroid)
+                break
+            if match is None:
+                buckets[key].append((me, centered, centroid))
+                continue
+            source, rotation, source_centroid = match
+            for obj in owners:
+                obj.data = source
+            if not pinned:
+                apply_instance_correction(owners, instance_correction(rotation, source_centroid, centroid))
+            relinked_count += len(owners)
+            replaced.append(me)
+        freed = sum(mesh_memory(me) for me in replaced)
+        batch_remove_ids(replaced, bpy.data.meshes)
+        shared_count = sum(1 for entries in buckets.values() for entry in entries)
+        elapsed = time.perf_counter() - start_time
+        self.report({'INFO'}, f"已将 {len(replaced)} 个重复网格替换为实例（{relinked_count} 个物体），"
+                              f"保留 {shared_count} 个网格，释放约 {freed / 1048576:.1f} MB（用时 {elapsed:.2f} 秒）")
         return {'FINISHED'}
 
 class OBJECT_OT_select_multi_material(bpy.types.Operator):
@@ -288,10 +2267,12 @@ class OBJECT_OT_select_multi_material(bpy.types.Operator):
         original_selection = context.selected_objects.copy()
         selected_count = 0
         # 清空当前选择
-        bpy.ops.object.select_all(action='DESELECT')
-        # 遍历所有可见物体
-        for obj in context.visible_objects:
-            if obj.type == 'MESH' and len(obj.material_slots) >= self.min_slots:
+        for obj in original_selection:
+            obj.select_set(False)
+        # 从场景索引取出命中的网格物体，只保留可见的
+        index = scene_attribute_index(context.scene)
+        for obj in index.objects_with_slots(context.scene, self.min_slots):
+            if obj.visible_get():
                 obj.select_set(True)
                 selected_count += 1
         # 如果没有选中物体则恢复原选择
@@ -303,79 +2284,89 @@ class OBJECT_OT_select_multi_material(bpy.types.Operator):
         self.report({'INFO'}, f"已选中 {selected_count} 个多材质物体")
         return {'FINISHED'}
 
-class OBJECT_OT_empty_to_collection(bpy.types.Operator):
+class OBJECT_OT_empty_to_collection(ChunkedOperator, bpy.types.Operator):
     """将空物体的父子层级结构转换为 Collection 嵌套结构"""
     bl_idname = "object.empty_to_collection"
     bl_label = "空物体转 Collection"
     bl_options = {'REGISTER', 'UNDO'}
 
-    def execute(self, context):
-        # 1. 收集所有 Empty 物体
+    def steps(self, context):
+        start_time = time.perf_counter()
+        # 1. 收集所有 Empty 物体（集合查找，避免列表 in 的 O(n²)）
         empty_objects = [obj for obj in bpy.data.objects if obj.type == 'EMPTY']
 
         if not empty_objects:
             self.report({'INFO'}, "场景中没有找到空物体。")
             return {'CANCELLED'}
-
-        # 2. 构建父子关系映射
-        empty_children_map = defaultdict(list)
-        root_empties = []
-
-        for obj in empty_objects:
-            parent = obj.parent
-            if parent and parent in empty_objects:
-                # 如果父级也是 Empty，则添加到父级的子列表中
-                empty_children_map[parent].append(obj)
-            else:
-                # 如果没有父级，或者父级不是 Empty，则为根节点
-                root_empties.append(obj)
-
-        # 3. 递归函数：处理单个 Empty 及其子层级
-        def process_empty(empty_obj, parent_collection):
-            # a. 创建对应此 Empty 的 Collection
-            collection_name = empty_obj.name
-            new_collection = bpy.data.collections.new(collection_name)
-
-            # b. 将新 Collection 链接到父级 Collection（或场景根集合）
+        empty_set = set(empty_objects)
+
+        # 2. 一次遍历构建父子关系映射（obj.children 每次调用都会扫描全部物体）
+        children_map = defaultdict(list)
+        for obj in bpy.data.objects:
+            if obj.parent is not None:
+                children_map[obj.parent].append(obj)
+        # 如果没有父级，或者父级不是 Empty，则为根节点
+        root_empties = [obj for obj in empty_objects if obj.parent not in empty_set]
+
+        # 3. 记录需要移动的非 Empty 子物体当前所在的 Collection（子 Empty 最终会被删除，无需移动）
+        moving = {child for empty in empty_objects for child in children_map[empty] if child not in empty_set}
+        owners = defaultdict(list)
+        for col in bpy.data.collections:
+            for obj in col.objects:
+                if obj in moving:
+                    owners[obj].append(col)
+        for scene in bpy.data.scenes:
+            for obj in scene.collection.objects:
+                if obj in moving:
+                    owners[obj].append(scene.collection)
+
+        # 4. 显式栈迭代遍历层级（深层装配树不会触发递归上限），逐个 Empty 创建集合并移动子物体
+        processed_count = 0
+        total = len(empty_objects)
+        stack = [(root_empty, context.scene.collection) for root_empty in reversed(root_empties)]
+        while stack:
+            empty_obj, parent_collection = stack.pop()
+            # a. 创建对应此 Empty 的 Collection，并链接到父级 Collection（或场景根集合）
+            new_collection = bpy.data.collections.new(empty_obj.name)
+            self.add_undo(bpy.data.collections.remove, new_collection)
             parent_collection.children.link(new_collection)
-
-            # c. 移动 Empty 的子物体（包括非 Empty 和子 Empty）到新 Collection
-            for child_obj in empty_obj.children:
-                # 从其当前所有父级 Collection 中移除
-                for col in child_obj.users_collection:
+            # b. 把 Empty 的非 Empty 子物体移入新集合
+            child_empties = []
+            for child_obj in children_map[empty_obj]:
+                if child_obj in empty_set:
+                    child_empties.append(child_obj)
+                    continue
+                for col in owners[child_obj]:
                     col.objects.unlink(child_obj)
-                # 添加到新创建的 Collection
+                    self.add_undo(col.objects.link, child_obj)
                 new_collection.objects.link(child_obj)
+            # c. 子 Empty 逆序入栈，保持与原层级相同的处理顺序
+            stack.extend((child_empty, new_collection) for child_empty in reversed(child_empties))
+            processed_count += 1
+            yield processed_count, total
 
-            # d. 递归处理子 Empty 物体
-            for child_empty in empty_children_map[empty_obj]:
-                process_empty(child_empty, new_collection)
+        # 5. 一次性删除所有被处理的 Empty 物体（不可取消的收尾）
+        batch_remove_ids(empty_objects, bpy.data.objects)
 
-            # e. 标记此 Empty 为待删除
-            # (在处理完所有层级后统一删除，避免在迭代时修改集合)
-            empties_to_delete.append(empty_obj)
-
-        # 4. 存储待删除的 Empty 物体
-        empties_to_delete = []
-
-        # 5. 从根节点开始处理
-        for root_empty in root_empties:
-            process_empty(root_empty, context.scene.collection)
-
-        # 6. 删除所有被处理的 Empty 物体
-        for empty_obj in empties_to_delete:
-            bpy.data.objects.remove(empty_obj, do_unlink=True)
-
-        self.report({'INFO'}, f"已将 {len(empties_to_delete)} 个空物体及其层级结构转换为 Collection。")
+        elapsed = time.perf_counter() - start_time
+        self.report({'INFO'}, f"已将 {processed_count} 个空物体及其层级结构转换为 Collection（用时 {elapsed:.2f} 秒）。")
         return {'FINISHED'}
 
-class OBJECT_OT_merge_duplicate_materials(bpy.types.Operator):
-    """根据指定后缀合并重复材质（如 .001 / _001 / -01）"""
+class OBJECT_OT_merge_duplicate_materials(ChunkedOperator, bpy.types.Operator):
+    """根据指定后缀（如 .001 / _001 / -01）或节点内容合并重复材质"""
     bl_idname = "object.merge_duplicate_materials"
     bl_label = "合并重复材质"
     bl_options = {'UNDO'} # 移除 'REGISTER' 以避免弹窗
 
-    def execute(self, context):
+    def steps(self, context):
+        start_time = time.perf_counter()
+        if context.scene.merge_mat_mode == 'CONTENT':
+            remap = yield from self.content_remap()
+            if not remap:
+                self.report({'WARNING'}, "未找到节点内容相同的重复材质。")
+                return {'CANCELLED'}
+            return (yield from self.apply_remap(remap, start_time))
+
         # 从场景属性获取后缀样例
         suffix = context.scene.merge_mat_suffix_pattern.strip()
         # print(f"DEBUG: 输入的后缀样例是: '{suffix}'") # 调试输出
@@ -436,9 +2427,8 @@ class OBJECT_OT_merge_duplicate_materials(bpy.types.Operator):
             self.report({'WARNING'}, f"未找到符合模式 '{static_part}+数字' 且需要合并的重复材质。")
             return {'CANCELLED'}
 
-        merged_count = 0
-        removed_count = 0
-
+        # --- 先为所有分组生成完整的 {重复材质: 主材质} 重映射表 ---
+        remap = {}
         for base_name, dup_list in grouped.items():
             # print(f"DEBUG: 处理分组 '{base_name}', 材质: {[m.name for m in dup_list]}") # 调试输出
             # --- 优先查找 *存在且有用户* 的基础名材质作为主材质 ---
@@ -446,36 +2436,67 @@ class OBJECT_OT_merge_duplicate_materials(bpy.types.Operator):
             for mat in dup_list:
                  if mat.name == base_name and mat.users > 0:
                      base_mat = mat
-                     # print(f"DEBUG: 选择存在的、有用户的 '{base_name}' 作为主材质。") # 调试输出
                      break
 
             # --- 如果没有找到，则从分组列表中选择一个作为主材质 ---
             if base_mat is None:
-                 dup_list_sorted = sorted(dup_list, key=lambda x: x.name)
-                 base_mat = dup_list_sorted[0]
-                 dup_list_to_merge = [m for m in dup_list_sorted if m != base_mat]
-                 # print(f"DEBUG: 未找到有用户的 '{base_name}'，选择 '{base_mat.name}' 作为主材质。") # 调试输出
-            else:
-                 # 如果找到了 base_mat，则将分组内其他材质合并到它
-                 dup_list_to_merge = [m for m in dup_list if m != base_mat]
-
-            # --- 执行合并 ---
-            for dup_mat in dup_list_to_merge:
-                 # print(f"DEBUG: 将 '{dup_mat.name}' 合并到 '{base_mat.name}'") # 调试输出
-                 for obj in bpy.data.objects:
-                    if not hasattr(obj.data, "materials"):
-                        continue
-                    for slot in obj.material_slots:
-                        if slot.material == dup_mat:
-                            slot.material = base_mat
-                 merged_count += 1
-                 try:
-                     bpy.data.materials.remove(dup_mat)
-                     removed_count += 1
-                 except:
-                     pass # 如果删除失败（例如，被其他地方引用），则跳过
-
-        self.report({'INFO'}, f"已合并 {merged_count} 个材质，删除 {removed_count} 个重复项。")
+                 base_mat = min(dup_list, key=lambda x: x.name)
+
+            for dup_mat in dup_list:
+                 if dup_mat != base_mat:
+                     remap[dup_mat] = base_mat
+
+        # --- 链式后缀（Body_001_002 -> Body_001 -> Body）需传递解析到最终主材质，
+        #     否则中间材质被删除后前者的插槽会变空 ---
+        for dup_mat, base_mat in remap.items():
+            seen = {dup_mat}
+            while base_mat in remap and base_mat not in seen:
+                seen.add(base_mat)
+                base_mat = remap[base_mat]
+            remap[dup_mat] = base_mat
+
+        return (yield from self.apply_remap(remap, start_time))
+
+    def content_remap(self):
+        """按节点内容哈希分桶，每桶保留用户最多的材质（生成器，每个材质汇报一次进度）
+
+        合并是破坏性操作：缓存的哈希可能已过期（脚本刚修改的值、不在当前视图层的材质），
+        分桶后只对成员不少于两个的桶重新计算哈希（不使用缓存）并再次分桶。
+        """
+        buckets = defaultdict(list)
+        memo = {}
+        materials = [mat for mat in bpy.data.materials if mat.users > 0 and mat.library is None]
+        for i, mat in enumerate(materials, 1):
+            buckets[material_hash(mat, memo)].append(mat)
+            yield i, len(materials)
+        candidates = [mat for bucket in buckets.values() if len(bucket) >= 2 for mat in bucket]
+        buckets = defaultdict(list)
+        memo = {}
+        for i, mat in enumerate(candidates, 1):
+            buckets[material_hash(mat, memo, rebuild=True)].append(mat)
+            yield i, len(candidates)
+        remap = {}
+        for bucket in buckets.values():
+            if len(bucket) < 2:
+                continue
+            survivor = min(bucket, key=lambda m: (-m.users, m.name))
+            remap.update({mat: survivor for mat in bucket if mat != survivor})
+        return remap
+
+    def apply_remap(self, remap, start_time):
+        # --- 一次扫描建立材质引用索引，再逐个材质应用重映射表 ---
+        index = material_user_index()
+        stats = {'data': 0, 'object': 0}
+        for i, (old_mat, new_mat) in enumerate(remap.items(), 1):
+            for key, count in apply_material_remap({old_mat: new_mat}, index, self.add_undo).items():
+                stats[key] += count
+            yield i, len(remap)
+        # 删除重复材质是不可取消的收尾
+        removed_count = batch_remove_ids(remap.keys(), bpy.data.materials)
+        elapsed = time.perf_counter() - start_time
+
+        self.report({'INFO'}, f"已合并 {len(remap)} 个材质，删除 {removed_count} 个重复项；"
+                              f"重映射网格数据 {stats['data']} 处、物体插槽 {stats['object']} 处，用时 {elapsed:.2f} 秒。")
         return {'FINISHED'}
 
 class OBJECT_OT_clean_unused_material_slots(bpy.types.Operator):
@@ -484,59 +2505,37 @@ class OBJECT_OT_clean_unused_material_slots(bpy.types.Operator):
     bl_label = "清理未使用材质插槽"
     bl_options = {'REGISTER', 'UNDO'}
     def execute(self, context):
-        sel = context.selected_objects
-        cleaned = 0
-        # 需要在 object 模式下并且对象为活动对象才能使用 material_slot_remove 操作
-        prev_active = context.view_layer.objects.active
+        start_time = time.perf_counter()
+        # 编辑模式下网格数据未同步，先回到物体模式
         prev_mode = context.mode
-        for obj in sel:
-            if obj.type != 'MESH' or not obj.material_slots:
-                continue
-            # 计算哪些插槽被使用（polygon.material_index）
-            used_indices = set(poly.material_index for poly in obj.data.polygons)
-            total_slots = len(obj.material_slots)
-            if len(used_indices) == total_slots:
-                continue  # 全部使用，无需清理
-            # 选中并设置为活动对象
-            for o in context.selected_objects:
-                o.select_set(False)
-            obj.select_set(True)
-            context.view_layer.objects.active = obj
-            # 确保处于 OBJECT 模式
-            if context.mode != 'OBJECT':
-                bpy.ops.object.mode_set(mode='OBJECT')
-            # 倒序删除未使用插槽，使用 bpy.ops 保证数据和 UI 正确刷新
-            for i in range(total_slots - 1, -1, -1):
-                if i not in used_indices:
-                    # set active material index 然后删除
-                    obj.active_material_index = i
-                    try:
-                        bpy.ops.object.material_slot_remove()
-                        cleaned += 1
-                    except Exception as e:
-                        self.report({'WARNING'}, f"{obj.name} 删除材质槽索引 {i} 失败: {e}")
-        # 恢复原始上下文选择与活动对象
-        for o in sel:
-            o.select_set(True)
-        if prev_active:
-            context.view_layer.objects.active = prev_active
-        if prev_mode != context.mode:
-            try:
-                bpy.ops.object.mode_set(mode=prev_mode)
-            except:
-                pass
-        self.report({'INFO'}, f"已清理 {cleaned} 个未使用材质插槽（仅针对所选物体）")
+        if prev_mode != 'OBJECT':
+            bpy.ops.object.mode_set(mode='OBJECT')
+        meshes = {obj.data for obj in context.selected_objects
+                  if obj.type == 'MESH' and obj.material_slots}
+        # 一次遍历建立 网格 -> 使用者 映射（共享网格的所有使用者都需要同步物体级插槽）
+        mesh_users = defaultdict(list)
+        for obj in bpy.data.objects:
+            if obj.type == 'MESH' and obj.data in meshes:
+                mesh_users[obj.data].append(obj)
+        cleaned = 0
+        for me in meshes:
+            cleaned += compact_material_slots(me, mesh_users[me])
+        if prev_mode == 'EDIT_MESH':
+            bpy.ops.object.mode_set(mode='EDIT')
+        elapsed = time.perf_counter() - start_time
+        self.report({'INFO'}, f"已清理 {cleaned} 个未使用材质插槽（{len(meshes)} 个网格, 用时 {elapsed:.2f} 秒）")
         return {'FINISHED'}
 
 # --- 修正：自动编组操作符 (增加确认弹窗、默认简单模式、执行后清理空集合) ---
-class OBJECT_OT_auto_group_objects(bpy.types.Operator):
+class OBJECT_OT_auto_group_objects(ChunkedOperator, bpy.types.Operator):
     """根据物体名称自动创建Collection并嵌套分组"""
     bl_idname = "object.auto_group_objects"
     bl_label = "自动编组"
     bl_options = {'REGISTER'} # 移除 'UNDO'，因为确认弹窗后执行，不需要额外的撤销步骤
 
     def invoke(self, context, event):
-        # 弹出确认对话框
+        # 弹出确认对话框，确认后以分块方式执行
+        self._interactive = True
         wm = context.window_manager
         return wm.invoke_props_dialog(self, width=400)
 
@@ -550,18 +2549,31 @@ class OBJECT_OT_auto_group_objects(bpy.types.Operator):
         col.label(text=f"当前模式: {'简单' if context.scene.auto_group_mode == 'simple' else '复杂'}")
         col.prop(context.scene, "auto_group_mode", text="") # 显示当前模式选择
 
-    def execute(self, context):
+    def steps(self, context):
         # 确认后执行
+        start_time = time.perf_counter()
         mode = context.scene.auto_group_mode
         # --- 修正点：遍历 bpy.data.objects 而不是 context.scene.objects ---
         # 这样可以处理所有物体，无论它们当前在哪个 Collection 中
         objects_to_process = [obj for obj in bpy.data.objects if obj.type == 'MESH']
         # --- 结束修正 ---
 
-        # 存储 Collection 引用，避免重复查找
-        collection_cache = {}
-
-        for obj in objects_to_process:
+        # 一次遍历集合树：得到每个集合的路径，以及每个物体所在的集合
+        root = context.scene.collection
+        collection_paths = collection_path_index(root)
+        object_owners = defaultdict(list)
+        for col in collection_paths:
+            for obj in col.objects:
+                object_owners[obj].append(col)
+        # 路径 -> Collection 缓存，预先填入已有集合，避免重复查找
+        collection_cache = {path: col for col, path in collection_paths.items()}
+
+        # --- 先计算完整的重组计划：目标 Collection -> 需要移动的物体 ---
+        relink_plan = defaultdict(list)
+        # 进度：先逐个物体计算计划，再逐个物体移动
+        total = len(objects_to_process) * 2
+        for step, obj in enumerate(objects_to_process, 1):
+            yield step, total
             name_parts = obj.name.split('_')
             if len(name_parts) < 2:
                 continue
@@ -569,139 +2581,71 @@ class OBJECT_OT_auto_group_objects(bpy.types.Operator):
             # --- 计算目标 Collection 路径 ---
             if mode == 'simple':
                 # 目标路径: Scene -> Part_Subpart
-                target_collection_path = ["", "_".join(name_parts[:-1])] # "" 代表根集合
+                target_collection_path = ("", "_".join(name_parts[:-1])) # "" 代表根集合
             else: # mode == 'complex'
                 # 目标路径: Scene -> Part -> Part_Subpart
                 collection_path_parts = name_parts[:-1]
                 if not collection_path_parts:
                     continue
                 # "" 代表根集合, Part, Part_Subpart
-                target_collection_path = [""] + collection_path_parts
-
-            # --- 获取当前 Collection 路径 ---
-            current_collections = list(obj.users_collection)
-            if not current_collections:
-                # 如果物体不在任何 Collection 中，当前路径为空
-                current_collection_path = [""]
-            else:
-                # 获取物体第一个父级 Collection
-                current_child_collection = current_collections[0]
-                # 追溯到根集合，构建当前路径
-                current_path_parts = [current_child_collection.name]
-                parent_collection = self.find_parent_collection(context.scene.collection, current_child_collection)
-                while parent_collection:
-                     current_path_parts.insert(0, parent_collection.name) # 插入到开头
-                     grandparent = self.find_parent_collection(context.scene.collection, parent_collection)
-                     parent_collection = grandparent
-                # 如果追溯到了根集合，路径应以 "" 开头
-                if current_path_parts and current_path_parts[0] != "":
-                    current_path_parts.insert(0, "") # 插入根集合标识符
-                current_collection_path = current_path_parts
-
-            # --- 比较路径 ---
-            # print(f"DEBUG: 物体 '{obj.name}' 当前路径: {current_collection_path}, 目标路径: {target_collection_path}") # 调试输出
-            if current_collection_path == target_collection_path:
-                # print(f"DEBUG: 物体 '{obj.name}' 路径已匹配，跳过。") # 调试输出
-                continue # 路径一致，无需操作
-
-            # --- 路径不一致，需要重组 ---
-            # 1. 根据目标路径创建或获取目标 Collection
-            target_collection = self.get_or_create_collection_by_path(context, target_collection_path, collection_cache)
-
-            # 2. 将物体从当前所有 Collection 中移除
-            for col in list(obj.users_collection):
-                col.objects.unlink(obj)
+                target_collection_path = ("",) + tuple(collection_path_parts)
 
-            # 3. 将物体链接到计算出的目标 Collection
-            target_collection.objects.link(obj)
-
-        # --- 新增：执行后清理空集合 ---
-        self.cleanup_empty_collections(context)
+            # --- 比较路径：物体只在一个 Collection 中且路径一致时跳过 ---
+            owners = object_owners.get(obj, ())
+            if len(owners) == 1 and collection_paths[owners[0]] == target_collection_path:
+                continue
 
-        self.report({'INFO'}, f"自动编组完成 (模式: {'简单' if mode == 'simple' else '复杂'})。已清理空集合。")
+            target_collection = self.get_or_create_collection_by_path(context, target_collection_path, collection_cache)
+            if len(owners) == 1 and owners[0] == target_collection:
+                continue
+            relink_plan[target_collection].append(obj)
+
+        # --- 按目标 Collection 批量应用计划 ---
+        moved_count = 0
+        for target_collection, objs in relink_plan.items():
+            for obj in objs:
+                # 不在当前场景集合树中的物体，退回到 users_collection 查询
+                for col in object_owners.get(obj) or list(obj.users_collection):
+                    col.objects.unlink(obj)
+                    self.add_undo(col.objects.link, obj)
+                target_collection.objects.link(obj)
+                self.add_undo(target_collection.objects.unlink, obj)
+                moved_count += 1
+                yield len(objects_to_process) + moved_count, total
+
+        # --- 新增：执行后清理空集合（不可取消的收尾） ---
+        deleted_count = cleanup_empty_collections(root)
+
+        elapsed = time.perf_counter() - start_time
+        self.report({'INFO'}, f"自动编组完成 (模式: {'简单' if mode == 'simple' else '复杂'})。"
+                              f"移动 {moved_count} 个物体，已清理 {deleted_count} 个空集合，用时 {elapsed:.2f} 秒。")
         return {'FINISHED'}
 
-    def find_parent_collection(self, root_collection, target_collection):
-        """查找 target_collection 的父级 Collection"""
-        def search_parent(parent, target):
-            for child in parent.children:
-                if child == target:
-                    return parent
-                found = search_parent(child, target)
-                if found:
-                    return found
-            return None
-        return search_parent(root_collection, target_collection)
-
     def get_or_create_collection_by_path(self, context, path, cache):
-        """根据路径列表创建或获取 Collection"""
+        """根据路径元组创建或获取 Collection，cache 以路径前缀元组为键"""
         if not path or path[0] != "": # 路径应以根集合标识符 "" 开头
              raise ValueError(f"Invalid path: {path}")
 
         current_parent = context.scene.collection
-        full_path_key = ""
 
-        for i, part_name in enumerate(path[1:], 1): # 跳过根标识符 ""
-            full_path_key += f"__{part_name}" # 使用特殊分隔符构建缓存键
-            collection = cache.get(full_path_key)
+        for i in range(2, len(path) + 1): # 跳过根标识符 ""
+            key = tuple(path[:i])
+            collection = cache.get(key)
             if not collection:
                 # 在当前父级下查找
+                part_name = path[i - 1]
                 collection = current_parent.children.get(part_name)
                 if not collection:
-                    # 创建新 Collection
+                    # 创建新 Collection（取消时删除）
                     collection = bpy.data.collections.new(part_name)
+                    self.add_undo(bpy.data.collections.remove, collection)
                     current_parent.children.link(collection)
-                cache[full_path_key] = collection
+                cache[key] = collection
 
             current_parent = collection
 
         return current_parent
 
-
-    def cleanup_empty_collections(self, context):
-        """递归查找并删除空的Collection"""
-        def is_collection_empty(collection):
-            # 检查 Collection 是否包含物体或子 Collection
-            return (not collection.objects and
-                    not any(is_collection_not_empty_recursive(sub_col) for sub_col in collection.children))
-
-        def is_collection_not_empty_recursive(collection):
-            # 辅助函数：检查 Collection 是否非空（包含物体或包含非空子 Collection）
-            if collection.objects:
-                return True
-            for sub_col in collection.children:
-                if is_collection_not_empty_recursive(sub_col):
-                    return True
-            return False
-
-        # 从场景根集合开始
-        root_collections = list(context.scene.collection.children)
-
-        # 递归查找空集合
-        empty_collections = []
-        def find_empty_recursive(collection):
-            for sub_col in collection.children:
-                find_empty_recursive(sub_col)
-                if is_collection_empty(sub_col):
-                    empty_collections.append(sub_col)
-            # 检查根集合本身是否为空（虽然不太可能，但保险起见）
-            if is_collection_empty(collection):
-                empty_collections.append(collection)
-
-        for root_col in root_collections:
-            find_empty_recursive(root_col)
-
-        # 删除找到的空集合
-        deleted_count = 0
-        for empty_col in empty_collections:
-            try:
-                bpy.data.collections.remove(empty_col)
-                deleted_count += 1
-            except:
-                pass # 如果删除失败（例如，被其他地方引用），则跳过
-
-        # print(f"DEBUG: 清理了 {deleted_count} 个空集合。") # 调试输出
-
 # --- 新增：手动清理空集合操作符 ---
 class OBJECT_OT_cleanup_empty_collections(bpy.types.Operator):
     """手动清理场景中所有空的Collection"""
@@ -710,45 +2654,224 @@ class OBJECT_OT_cleanup_empty_collections(bpy.types.Operator):
     bl_options = {'REGISTER', 'UNDO'}
 
     def execute(self, context):
-        # 重用 auto_group_objects 中的清理逻辑
-        # 也可以创建一个独立的清理函数
-        def is_collection_empty(collection):
-            return (not collection.objects and
-                    not any(is_collection_not_empty_recursive(sub_col) for sub_col in collection.children))
-
-        def is_collection_not_empty_recursive(collection):
-            if collection.objects:
-                return True
-            for sub_col in collection.children:
-                if is_collection_not_empty_recursive(sub_col):
-                    return True
-            return False
-
-        root_collections = list(context.scene.collection.children)
-        empty_collections = []
-
-        def find_empty_recursive(collection):
-            for sub_col in collection.children:
-                find_empty_recursive(sub_col)
-                if is_collection_empty(sub_col):
-                    empty_collections.append(sub_col)
-            if is_collection_empty(collection):
-                empty_collections.append(collection)
-
-        for root_col in root_collections:
-            find_empty_recursive(root_col)
-
-        deleted_count = 0
-        for empty_col in empty_collections:
+        # 与 auto_group_objects 共用同一清理逻辑
+        start_time = time.perf_counter()
+        deleted_count = cleanup_empty_collections(context.scene.collection)
+        elapsed = time.perf_counter() - start_time
+        self.report({'INFO'}, f"已手动清理 {deleted_count} 个空集合（用时 {elapsed:.2f} 秒）。")
+        return {'FINISHED'}
+
+
+# 清理流水线步骤：(属性名, 名称)，按此顺序显示耗时
+CLEANUP_STEPS = (
+    ('vertex_groups', "空顶点组"),
+    ('material_slots', "未使用材质插槽"),
+    ('custom_normals', "拆边法线"),
+    ('triangulate', "三角化修改器"),
+    ('rename', "按集合重命名"),
+)
+
+class OBJECT_OT_cleanup_pipeline(bpy.types.Operator):
+    """一次遍历所选物体及其网格，完成多项清理（代替依次执行多个清理操作符）"""
+    bl_idname = "object.cleanup_pipeline"
+    bl_label = "一键清理"
+    bl_options = {'REGISTER', 'UNDO'}
+    vertex_groups: bpy.props.BoolProperty(name="清理空顶点组", default=True)
+    material_slots: bpy.props.BoolProperty(name="清理未使用材质插槽", default=True)
+    custom_normals: bpy.props.BoolProperty(name="清除拆边法线", default=False)
+    triangulate: bpy.props.BoolProperty(name="删除三角化修改器", default=False)
+    rename: bpy.props.BoolProperty(name="按集合重命名", default=True)
+    unshare_data: bpy.props.BoolProperty(
+        name="拆分共享数据",
+        default=False,
+        description="重命名时为共享网格的物体复制独立数据（会增加内存占用）"
+    )
+    @classmethod
+    def poll(cls, context):
+        return context.selected_objects
+    def execute(self, context):
+        start_time = time.perf_counter()
+        timings = dict.fromkeys((key for key, _ in CLEANUP_STEPS), 0.0)
+        counts = dict.fromkeys(timings, 0)
+        prev_mode = context.mode
+        if prev_mode != 'OBJECT':
+            bpy.ops.object.mode_set(mode='OBJECT')
+        selected_objects = context.selected_objects.copy()
+
+        # 物体级步骤：一次遍历，同时收集每个网格的第一个使用者
+        meshes = {}
+        for obj in selected_objects:
+            if obj.type != 'MESH':
+                continue
+            meshes.setdefault(obj.data, obj)
+            if self.triangulate and obj.modifiers:
+                step_start = time.perf_counter()
+                for mod in reversed(obj.modifiers):
+                    if mod.type == 'TRIANGULATE':
+                        obj.modifiers.remove(mod)
+                        counts['triangulate'] += 1
+                timings['triangulate'] += time.perf_counter() - step_start
+
+        # 共享网格的所有使用者都需要同步物体级材质插槽
+        mesh_users = defaultdict(list)
+        if self.material_slots:
+            step_start = time.perf_counter()
+            for obj in bpy.data.objects:
+                if obj.type == 'MESH' and obj.data in meshes:
+                    mesh_users[obj.data].append(obj)
+            timings['material_slots'] += time.perf_counter() - step_start
+
+        # 网格级步骤：每个网格只访问一次，material_index 与顶点组归属各读一次
+        for me, obj in meshes.items():
+            if self.custom_normals and me.has_custom_normals:
+                step_start = time.perf_counter()
+                try:
+                    if not clear_custom_normals(me):
+                        with context.temp_override(active_object=obj, object=obj, selected_objects=[obj]):
+                            bpy.ops.mesh.customdata_custom_splitnormals_clear()
+                    counts['custom_normals'] += 1
+                except Exception as e:
+                    self.report({'WARNING'}, f"处理 {me.name} 失败: {str(e)}")
+                timings['custom_normals'] += time.perf_counter() - step_start
+            if self.material_slots and me.materials:
+                step_start = time.perf_counter()
+                material_index = read_array(me.polygons, "material_index", len(me.polygons), np.int32)
+                counts['material_slots'] += compact_material_slots(me, mesh_users[me], material_index)
+                timings['material_slots'] += time.perf_counter() - step_start
+            if self.vertex_groups and obj.vertex_groups:
+                step_start = time.perf_counter()
+                counts['vertex_groups'] += remove_unused_vertex_groups(obj)
+                timings['vertex_groups'] += time.perf_counter() - step_start
+
+        if self.rename:
+            step_start = time.perf_counter()
+            object_names, data_names, _copied = collection_rename_plan(selected_objects, self.unshare_data)
             try:
-                bpy.data.collections.remove(empty_col)
-                deleted_count += 1
-            except:
-                pass
+                bulk_rename(data_names)
+                counts['rename'] = bulk_rename(object_names)
+            except Exception as e:
+                self.report({'ERROR'}, f"重命名失败: {str(e)}")
+            timings['rename'] += time.perf_counter() - step_start
+
+        # 所有网格处理完后统一更新一次依赖图
+        if counts['custom_normals']:
+            context.view_layer.update()
+        if prev_mode == 'EDIT_MESH':
+            bpy.ops.object.mode_set(mode='EDIT')
+        elapsed = time.perf_counter() - start_time
+        breakdown = " | ".join(f"{label} {counts[key]} ({timings[key]:.2f}s)"
+                               for key, label in CLEANUP_STEPS if getattr(self, key))
+        self.report({'INFO'}, f"清理完成（{len(selected_objects)} 个物体, {len(meshes)} 个网格, "
+                              f"用时 {elapsed:.2f} 秒）：{breakdown}")
+        return {'FINISHED'}
+
+class OBJECT_OT_export_profile(bpy.types.Operator, ExportHelper):
+    """把性能分析记录导出为 JSON Lines 文件（每行一次操作符执行）"""
+    bl_idname = "object.export_profile"
+    bl_label = "导出性能记录"
+    bl_options = {'REGISTER'}
+    filename_ext = ".jsonl"
+    filter_glob: bpy.props.StringProperty(default="*.jsonl", options={'HIDDEN'})
 
-        self.report({'INFO'}, f"已手动清理 {deleted_count} 个空集合。")
+    def execute(self, context):
+        if not profile_records:
+            self.report({'WARNING'}, "没有性能记录可导出。")
+            return {'CANCELLED'}
+        with open(self.filepath, "w", encoding="utf-8") as f:
+            for record in profile_records:
+                f.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+        self.report({'INFO'}, f"已导出 {len(profile_records)} 条性能记录到 {self.filepath}")
+        return {'FINISHED'}
+
+class OBJECT_OT_clear_profile(bpy.types.Operator):
+    """清空性能分析记录"""
+    bl_idname = "object.clear_profile"
+    bl_label = "清空性能记录"
+    bl_options = {'REGISTER'}
+
+    def execute(self, context):
+        profile_records.clear()
         return {'FINISHED'}
 
+class OBJECT_OT_print_profile(bpy.types.Operator):
+    """在系统控制台打印一条记录的 cProfile 结果"""
+    bl_idname = "object.print_profile"
+    bl_label = "打印 cProfile 结果"
+    bl_options = {'REGISTER'}
+    index: bpy.props.IntProperty(default=-1)
+
+    def execute(self, context):
+        try:
+            record = profile_records[self.index]
+        except IndexError:
+            return {'CANCELLED'}
+        print(f"===== {record['operator']} ({record['seconds']:.3f}s) =====")
+        print(record.get('profile', "（未开启 cProfile）"))
+        self.report({'INFO'}, "cProfile 结果已打印到系统控制台。")
+        return {'FINISHED'}
+
+class OBJECT_OT_batch_session_start(bpy.types.Operator):
+    """开始批处理会话：会话内的 AT 操作不再各自写入撤销步骤，结束时合并为一步"""
+    bl_idname = "object.batch_session_start"
+    bl_label = "开始批处理会话"
+    bl_options = {'REGISTER'}
+    suspend_undo: bpy.props.BoolProperty(
+        name="暂停撤销",
+        default=False,
+        description="会话期间关闭全局撤销（包括非 AT 操作），最省内存，但会话内无法逐步撤销"
+    )
+    @classmethod
+    def poll(cls, context):
+        return not batch_session
+    def execute(self, context):
+        # 先写入一个撤销步骤，结束会话后一次撤销即可回到这里
+        push_seconds, push_memory = timed_undo_push("AT 批处理会话开始")
+        collapsed = [cls for cls in profiled_classes() if 'UNDO' in cls.bl_options]
+        set_operator_undo(collapsed, False)
+        preferences = context.preferences
+        global_undo = preferences_save = None
+        if self.suspend_undo and hasattr(preferences.edit, "use_global_undo"):
+            # 全局撤销是偏好设置；会话期间关闭偏好自动保存，
+            # 即使会话未正常结束（直接退出 Blender），关闭的撤销也不会被写入用户偏好
+            global_undo = preferences.edit.use_global_undo
+            preferences_save = preferences.use_preferences_save
+            preferences.use_preferences_save = False
+            preferences.edit.use_global_undo = False
+        batch_session.update({
+            'start': time.perf_counter(),
+            'operations': 0,
+            'collapsed': collapsed,
+            'global_undo': global_undo,
+            'preferences_save': preferences_save,
+            'push_seconds': push_seconds,
+            'push_memory': push_memory,
+        })
+        mode = "已暂停撤销" if global_undo is not None else "AT 操作合并为一个撤销步骤"
+        self.report({'INFO'}, f"批处理会话已开始（{mode}）")
+        return {'FINISHED'}
+
+class OBJECT_OT_batch_session_end(bpy.types.Operator):
+    """结束批处理会话：恢复撤销设置，并把会话内的修改写入一个撤销步骤"""
+    bl_idname = "object.batch_session_end"
+    bl_label = "结束批处理会话"
+    bl_options = {'REGISTER'}
+    @classmethod
+    def poll(cls, context):
+        return bool(batch_session)
+    def execute(self, context):
+        saved_seconds, saved_memory = session_savings()
+        session = end_batch_session()
+        timed_undo_push(f"AT 批处理会话（{session['operations']} 次操作）")
+        elapsed = time.perf_counter() - session['start']
+        memory_text = "未知" if saved_memory is None else f"{saved_memory / 1048576:.1f} MB"
+        self.report({'INFO'}, f"批处理会话结束：{session['operations']} 次操作合并为一个撤销步骤，历时 {elapsed:.1f} 秒；"
+                              f"估算节省撤销写入 {saved_seconds:.2f} 秒、内存 {memory_text}（按单次写入开销 × 操作次数）")
+        return {'FINISHED'}
+
+# 不参与性能统计与撤销合并的操作符（性能面板与批处理会话自身的操作）
+PROFILE_OPERATORS = (OBJECT_OT_export_profile, OBJECT_OT_clear_profile, OBJECT_OT_print_profile,
+                     OBJECT_OT_batch_session_start, OBJECT_OT_batch_session_end)
+
 
 # ---------------------- 用户界面 (包含 UI 修正和新增按钮) ----------------------
 class VIEW3D_PT_join_tools(bpy.types.Panel):
@@ -769,8 +2892,14 @@ class VIEW3D_PT_join_tools(bpy.types.Panel):
         # col.operator(OBJECT_OT_empty_to_collection.bl_idname, icon='OUTLINER_OB_EMPTY') # 移除此行
         col.operator(OBJECT_OT_join_with_pregroups.bl_idname, icon='AUTOMERGE_ON')
         col.operator(OBJECT_OT_select_vertex_group_elements.bl_idname, icon='GROUP_VERTEX')
+        part_row = col.row(align=True)
+        part_row.operator(OBJECT_OT_part_elements.bl_idname, text="选择部件", icon='RESTRICT_SELECT_OFF').action = 'SELECT'
+        part_row.operator(OBJECT_OT_part_elements.bl_idname, text="隐藏", icon='HIDE_ON').action = 'HIDE'
+        part_row.operator(OBJECT_OT_part_elements.bl_idname, text="分离", icon='MOD_EXPLODE').action = 'SEPARATE'
         col.operator(OBJECT_OT_clean_empty_vertex_groups.bl_idname, icon='BRUSH_DATA')
         col.operator(OBJECT_OT_clear_custom_normals.bl_idname, icon='NORMALS_VERTEX_FACE')
+        col.operator(OBJECT_OT_weld_vertices.bl_idname, icon='AUTOMERGE_OFF')
+        col.operator(OBJECT_OT_instance_duplicate_meshes.bl_idname, icon='LINKED')
 
         # --- 修正：重组结构 UI ---
         restructure_box = main_box.box()
@@ -794,18 +2923,23 @@ class VIEW3D_PT_join_tools(bpy.types.Panel):
         # 1. 独立的按钮行
         mat_col.operator(OBJECT_OT_merge_duplicate_materials.bl_idname, text="合并重复材质", icon='NODE_MATERIAL')
 
-        # 2. 输入框行，带标签和信息图标
+        # 2. 合并依据（命名后缀 / 节点内容）
+        mat_col.prop(context.scene, "merge_mat_mode", expand=True)
+
+        # 3. 输入框行，带标签和信息图标
         input_row = mat_col.row(align=True)
+        input_row.enabled = context.scene.merge_mat_mode == 'SUFFIX'
         input_row.prop(context.scene, "merge_mat_suffix_pattern", text="命名规律示例")
         input_row.operator("wm.context_toggle", icon='INFO', text="", depress=context.scene.show_merge_help).data_path = "scene.show_merge_help"
 
-        # 3. 可选的帮助说明框
+        # 4. 可选的帮助说明框
         if context.scene.show_merge_help:
             help_box = mat_col.box()
             help_box.label(text="示例：", icon='QUESTION')
             help_box.label(text="• .001 → 匹配 Material.001, Material.002 ...")
             help_box.label(text="• _001 → 匹配 Wheel_001, Wheel_002 ...")
             help_box.label(text="• -01 → 匹配 Door-01, Door-02 ...")
+            help_box.label(text="• 按内容 → 合并节点、连线、参数与贴图完全相同的材质")
             help_box.label(text="提示：仅处理当前场景中有用户的材质。")
         # --- 结束合并重复材质 UI ---
 
@@ -821,33 +2955,128 @@ class VIEW3D_PT_join_tools(bpy.types.Panel):
         check_box = export_box.box()
         check_box.label(text="模型检查", icon='VIEWZOOM')
         check_box.operator(OBJECT_OT_select_non_uniform_scale.bl_idname, icon='CON_SIZELIKE')
+        check_box.operator(OBJECT_OT_audit_scene.bl_idname, icon='CHECKMARK')
+        duplicate_row = check_box.row(align=True)
+        duplicate_row.operator(OBJECT_OT_find_coincident_duplicates.bl_idname, icon='SELECT_INTERSECT')
+        duplicate_row.operator(OBJECT_OT_find_coincident_duplicates.bl_idname, text="", icon='TRASH').action = 'DELETE'
+        results = audit_results.get(context.scene.name)
+        if results:
+            result_col = check_box.column(align=True)
+            for key, label, _ in AUDIT_CATEGORIES:
+                row = result_col.row(align=True)
+                row.enabled = bool(results[key])
+                row.operator(OBJECT_OT_select_audit_category.bl_idname,
+                             text=f"{label}: {len(results[key])}", icon='RESTRICT_SELECT_OFF').category = key
         # 优化工具
         optimize_box = export_box.box()
         optimize_box.label(text="导出优化", icon='MODIFIER')
         col = optimize_box.column(align=True)
+        col.operator(OBJECT_OT_cleanup_pipeline.bl_idname, icon='BRUSH_DATA')
         col.operator(OBJECT_OT_rename_to_collection.bl_idname, icon='OUTLINER_COLLECTION')
         col.operator(OBJECT_OT_triangulate_objects.bl_idname, icon='MOD_TRIANGULATE')
+        col.operator(OBJECT_OT_triangulate_objects.bl_idname, text="直接三角化", icon='MESH_DATA').mode = 'APPLY'
         col.operator(OBJECT_OT_remove_triangulate.bl_idname, icon='X')
 
 
+class VIEW3D_PT_at_profiling(bpy.types.Panel):
+    bl_label = "性能分析"
+    bl_idname = "VIEW3D_PT_at_profiling"
+    bl_space_type = 'VIEW_3D'
+    bl_region_type = 'UI'
+    bl_category = "AT"
+    bl_parent_id = "VIEW3D_PT_join_tools"
+    bl_options = {'DEFAULT_CLOSED'}
+    def draw(self, context):
+        layout = self.layout
+        scene = context.scene
+        row = layout.row(align=True)
+        row.prop(scene, "at_profiling_enabled")
+        sub = row.row(align=True)
+        sub.enabled = scene.at_profiling_enabled
+        sub.prop(scene, "at_profiling_cprofile")
+        row = layout.row(align=True)
+        row.operator(OBJECT_OT_export_profile.bl_idname, icon='EXPORT')
+        row.operator(OBJECT_OT_clear_profile.bl_idname, text="", icon='TRASH')
+        if not profile_records:
+            layout.label(text="暂无记录")
+            return
+        total = sum(record['seconds'] for record in profile_records)
+        layout.label(text=f"{len(profile_records)} 次执行，共 {total:.2f} 秒")
+        col = layout.column(align=True)
+        # 最近的 10 条，最新的在上
+        for index in range(len(profile_records) - 1, max(len(profile_records) - 11, -1), -1):
+            record = profile_records[index]
+            box = col.box()
+            row = box.row(align=True)
+            row.label(text=f"{record['label']}  {record['seconds']:.3f}s", icon='TIME')
+            if 'profile' in record:
+                row.operator(OBJECT_OT_print_profile.bl_idname, text="", icon='CONSOLE').index = index
+            created = sum(record['created'].values())
+            removed = sum(record['removed'].values())
+            box.label(text=f"选中 {record['selected']} | 物体改动 {record['objects_changed']} | "
+                           f"网格改动 {record['meshes_changed']} | 新增 {created} | 删除 {removed}")
+
+
+class VIEW3D_PT_at_batch_session(bpy.types.Panel):
+    bl_label = "批处理会话"
+    bl_idname = "VIEW3D_PT_at_batch_session"
+    bl_space_type = 'VIEW_3D'
+    bl_region_type = 'UI'
+    bl_category = "AT"
+    bl_parent_id = "VIEW3D_PT_join_tools"
+    bl_options = {'DEFAULT_CLOSED'}
+    def draw(self, context):
+        layout = self.layout
+        if not batch_session:
+            col = layout.column(align=True)
+            col.operator(OBJECT_OT_batch_session_start.bl_idname, icon='PLAY')
+            col.operator(OBJECT_OT_batch_session_start.bl_idname, text="开始会话（暂停撤销）",
+                         icon='CANCEL').suspend_undo = True
+            return
+        saved_seconds, saved_memory = session_savings()
+        elapsed = time.perf_counter() - batch_session['start']
+        col = layout.column(align=True)
+        col.label(text=f"进行中：{batch_session['operations']} 次操作，{elapsed:.0f} 秒", icon='REC')
+        if batch_session['global_undo'] is not None:
+            col.label(text="撤销已暂停", icon='ERROR')
+        col.label(text=f"估算节省撤销写入 {saved_seconds:.2f} 秒")
+        if saved_memory is not None:
+            col.label(text=f"估算节省内存 {saved_memory / 1048576:.1f} MB")
+        layout.operator(OBJECT_OT_batch_session_end.bl_idname, icon='SNAP_FACE')
+
+
 # ---------------------- 注册 (包含新增类和属性) ----------------------
 classes = (
     OBJECT_OT_join_with_pregroups,
     OBJECT_OT_select_vertex_group_elements,
+    OBJECT_OT_part_elements,
     OBJECT_OT_split_by_material,
     OBJECT_OT_clean_empty_vertex_groups,
     OBJECT_OT_select_non_uniform_scale,
+    OBJECT_OT_audit_scene,
+    OBJECT_OT_select_audit_category,
+    OBJECT_OT_find_coincident_duplicates,
     OBJECT_OT_rename_to_collection,
     OBJECT_OT_triangulate_objects,
     OBJECT_OT_remove_triangulate,
     OBJECT_OT_clear_custom_normals,
+    OBJECT_OT_weld_vertices,
+    OBJECT_OT_instance_duplicate_meshes,
     OBJECT_OT_select_multi_material,
     OBJECT_OT_empty_to_collection,
     OBJECT_OT_merge_duplicate_materials,
     OBJECT_OT_clean_unused_material_slots,
     OBJECT_OT_auto_group_objects, # 新增
     OBJECT_OT_cleanup_empty_collections, # 新增
+    OBJECT_OT_cleanup_pipeline,
+    OBJECT_OT_export_profile,
+    OBJECT_OT_clear_profile,
+    OBJECT_OT_print_profile,
+    OBJECT_OT_batch_session_start,
+    OBJECT_OT_batch_session_end,
     VIEW3D_PT_join_tools,
+    VIEW3D_PT_at_profiling,
+    VIEW3D_PT_at_batch_session,
 )
 
 # 添加场景属性控制阈值
@@ -866,6 +3095,17 @@ bpy.types.Scene.merge_mat_suffix_pattern = bpy.props.StringProperty(
     default=".001"
 )
 
+# 添加场景属性用于选择合并重复材质的依据
+bpy.types.Scene.merge_mat_mode = bpy.props.EnumProperty(
+    name="合并依据",
+    description="选择判断重复材质的方式",
+    items=[
+        ('SUFFIX', "按命名后缀", "合并名称符合后缀规律的材质（如 Material.001）"),
+        ('CONTENT', "按节点内容", "合并节点树内容完全相同的材质，与名称无关"),
+    ],
+    default='SUFFIX'
+)
+
 # 添加场景属性用于控制帮助说明的显示/隐藏
 bpy.types.Scene.show_merge_help = bpy.props.BoolProperty(
     name="显示合并材质帮助",
@@ -884,17 +3124,57 @@ bpy.types.Scene.auto_group_mode = bpy.props.EnumProperty(
     default='simple' # 修正：默认为简单模式
 )
 
+# 添加场景属性用于控制性能分析
+bpy.types.Scene.at_profiling_enabled = bpy.props.BoolProperty(
+    name="记录性能",
+    description="记录每次执行 AT 操作符的耗时与改动的数据块数量",
+    default=False
+)
+
+bpy.types.Scene.at_profiling_cprofile = bpy.props.BoolProperty(
+    name="cProfile",
+    description="同时用 cProfile 采集函数级耗时（会明显拖慢执行）",
+    default=False
+)
+
+def profiled_classes():
+    return [cls for cls in classes if issubclass(cls, bpy.types.Operator) and cls not in PROFILE_OPERATORS]
+
 def register():
+    instrument_operators(profiled_classes())
     for cls in classes:
         bpy.utils.register_class(cls)
+    bpy.app.handlers.load_pre.append(clear_caches)
+    bpy.app.handlers.load_pre.append(end_session_on_load)
+    bpy.app.handlers.depsgraph_update_post.append(invalidate_material_hashes)
+    bpy.app.handlers.depsgraph_update_post.append(update_scene_indices)
+    bpy.app.handlers.depsgraph_update_post.append(invalidate_group_indices)
+    for handlers in (bpy.app.handlers.undo_post, bpy.app.handlers.redo_post):
+        handlers.append(reset_scene_indices)
 
 def unregister():
+    if batch_session:
+        end_batch_session()
     for cls in reversed(classes):
         bpy.utils.unregister_class(cls)
+    restore_operators(profiled_classes())
+    for handler in (clear_caches, end_session_on_load):
+        if handler in bpy.app.handlers.load_pre:
+            bpy.app.handlers.load_pre.remove(handler)
+    for handler in (invalidate_material_hashes, update_scene_indices, invalidate_group_indices):
+        if handler in bpy.app.handlers.depsgraph_update_post:
+            bpy.app.handlers.depsgraph_update_post.remove(handler)
+    for handlers in (bpy.app.handlers.undo_post, bpy.app.handlers.redo_post):
+        if reset_scene_indices in handlers:
+            handlers.remove(reset_scene_indices)
+    clear_caches()
     del bpy.types.Scene.at_multi_material_threshold
     del bpy.types.Scene.merge_mat_suffix_pattern
+    del bpy.types.Scene.merge_mat_mode
     del bpy.types.Scene.show_merge_help
     del bpy.types.Scene.auto_group_mode # 修正
+    del bpy.types.Scene.at_profiling_enabled
+    del bpy.types.Scene.at_profiling_cprofile
 
 if __name__ == "__main__":
     register()
\ No newline at end of file
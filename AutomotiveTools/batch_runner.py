@@ -0,0 +1,224 @@
+"""Automotive Tools 批处理流水线（无界面批量清理 .blend 文件）
+
+用法：
+    # 调度：并行启动多个后台 Blender，每个文件一个进程
+    blender -b --python AutomotiveTools/batch_runner.py -- \
+        --input ./supplier_files --output ./cleaned --workers 8 \
+        --steps empty_to_collection,merge_duplicate_materials,triangulate_objects:mode=APPLY
+
+    # 也可以直接用系统 Python 调度（需通过 --blender 指定 Blender 可执行文件）
+    python AutomotiveTools/batch_runner.py --blender /opt/blender/blender --input ... --output ...
+
+每个文件的步骤耗时与结果写入 --log 指定的 JSON Lines 文件。
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import subprocess
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+try:
+    import bpy
+except ImportError:  # 作为调度器在系统 Python 中运行
+    bpy = None
+
+# 步骤名 -> (操作符 idname, 是否需要先选中全部物体)
+PIPELINE_STEPS = {
+    'empty_to_collection': ("object.empty_to_collection", False),
+    'auto_group_objects': ("object.auto_group_objects", False),
+    'cleanup_empty_collections': ("object.cleanup_empty_collections", False),
+    'merge_duplicate_materials': ("object.merge_duplicate_materials", False),
+    'clean_unused_material_slots': ("object.clean_unused_material_slots", True),
+    'clean_empty_vertex_groups': ("object.clean_empty_vertex_groups", True),
+    'clear_custom_normals': ("object.clear_custom_normals", True),
+    'triangulate_objects': ("object.triangulate_objects", True),
+    'remove_triangulate': ("object.remove_triangulate", True),
+    'rename_to_collection': ("object.rename_to_collection", True),
+    'cleanup_pipeline': ("object.cleanup_pipeline", True),
+}
+DEFAULT_STEPS = ("empty_to_collection,merge_duplicate_materials,clean_unused_material_slots,"
+                 "clean_empty_vertex_groups,triangulate_objects,rename_to_collection")
+
+
+def parse_args():
+    argv = sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else sys.argv[1:]
+    parser = argparse.ArgumentParser(description="Automotive Tools 批处理流水线")
+    parser.add_argument("--input", help="待处理 .blend 文件所在目录（递归查找）")
+    parser.add_argument("--output", help="处理结果保存目录（保持相对路径）")
+    parser.add_argument("--steps", default=DEFAULT_STEPS,
+                        help="逗号分隔的步骤序列，可用 步骤:属性=值 传入操作符参数")
+    parser.add_argument("--workers", type=int, default=max((os.cpu_count() or 2) // 2, 1),
+                        help="同时运行的 Blender 进程数")
+    parser.add_argument("--blender", default=bpy.app.binary_path if bpy else "blender",
+                        help="Blender 可执行文件路径")
+    parser.add_argument("--log", default="batch_log.jsonl", help="结果日志（JSON Lines）")
+    parser.add_argument("--timeout", type=float, default=0, help="单个文件超时（秒，0 表示不限）")
+    # 以下参数由调度器传给工作进程
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--save-as", help=argparse.SUPPRESS)
+    parser.add_argument("--result", help=argparse.SUPPRESS)
+    return parser.parse_args(argv)
+
+
+def parse_value(text):
+    """把命令行中的属性值转换为 bool/int/float/str"""
+    lowered = text.lower()
+    if lowered in {"true", "false"}:
+        return lowered == "true"
+    for cast in (int, float):
+        try:
+            return cast(text)
+        except ValueError:
+            pass
+    return text
+
+
+def parse_steps(text):
+    """解析 'step:key=value:key=value,step' 为 [(步骤名, {属性: 值})]"""
+    steps = []
+    for item in filter(None, (part.strip() for part in text.split(","))):
+        name, *options = item.split(":")
+        if name not in PIPELINE_STEPS:
+            raise ValueError(f"未知步骤: {name}（可用: {', '.join(PIPELINE_STEPS)}）")
+        props = {}
+        for option in options:
+            key, _, value = option.partition("=")
+            props[key] = parse_value(value)
+        steps.append((name, props))
+    return steps
+
+
+# ---------------------- 工作进程（在后台 Blender 中运行） ----------------------
+def select_all_objects():
+    view_layer = bpy.context.view_layer
+    for obj in view_layer.objects:
+        if obj.visible_get() and not obj.hide_select:
+            obj.select_set(True)
+    if view_layer.objects.active is None:
+        meshes = [obj for obj in view_layer.objects if obj.type == 'MESH']
+        view_layer.objects.active = meshes[0] if meshes else None
+
+
+def run_step(name, props):
+    """运行单个步骤，返回日志条目"""
+    idname, needs_selection = PIPELINE_STEPS[name]
+    category, op_name = idname.split(".")
+    operator = getattr(getattr(bpy.ops, category), op_name)
+    if bpy.context.mode != 'OBJECT':
+        bpy.ops.object.mode_set(mode='OBJECT')
+    if needs_selection:
+        select_all_objects()
+    entry = {'step': name, 'props': props}
+    start = time.perf_counter()
+    try:
+        entry['result'] = sorted(operator(**props))
+    except Exception as e:
+        entry['result'] = ['ERROR']
+        entry['error'] = str(e)
+    entry['seconds'] = time.perf_counter() - start
+    return entry
+
+
+def run_worker(args):
+    # 允许从源码目录直接运行，无需先安装插件
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    import AutomotiveTools
+    AutomotiveTools.register()
+    record = {'file': bpy.data.filepath, 'steps': [], 'objects_before': len(bpy.data.objects)}
+    start = time.perf_counter()
+    try:
+        # 任一步骤出错即停止，不保存处理了一半的文件
+        for name, props in parse_steps(args.steps):
+            entry = run_step(name, props)
+            record['steps'].append(entry)
+            if 'error' in entry:
+                record['error'] = f"步骤 {name} 出错: {entry['error']}"
+                break
+        if args.save_as and 'error' not in record:
+            os.makedirs(os.path.dirname(args.save_as), exist_ok=True)
+            bpy.ops.wm.save_as_mainfile(filepath=args.save_as, copy=True)
+            record['saved_as'] = args.save_as
+    except Exception as e:
+        record['error'] = str(e)
+    finally:
+        AutomotiveTools.unregister()
+    record['objects_after'] = len(bpy.data.objects)
+    record['seconds'] = time.perf_counter() - start
+    if args.result:
+        with open(args.result, "w", encoding="utf-8") as f:
+            json.dump(record, f, ensure_ascii=False)
+
+
+# ---------------------- 调度器 ----------------------
+def find_blend_files(directory):
+    for root, _dirs, files in os.walk(directory):
+        for filename in sorted(files):
+            if filename.lower().endswith(".blend"):
+                yield os.path.join(root, filename)
+
+
+def process_file(args, path):
+    """启动一个后台 Blender 处理单个文件，返回日志记录"""
+    save_as = os.path.join(os.path.abspath(args.output), os.path.relpath(path, args.input))
+    fd, result_path = tempfile.mkstemp(suffix=".json")
+    os.close(fd)
+    command = [
+        args.blender, "-b", "--factory-startup", path, "--python", os.path.abspath(__file__), "--",
+        "--worker", "--steps", args.steps, "--save-as", save_as, "--result", result_path,
+    ]
+    start = time.perf_counter()
+    record = {}
+    # 单个文件的任何失败只记入该文件的日志，不中断整批处理
+    try:
+        proc = subprocess.run(command, capture_output=True, text=True, timeout=args.timeout or None)
+        record['returncode'] = proc.returncode
+        if proc.returncode != 0:
+            record['stderr'] = proc.stderr[-4000:]
+        with open(result_path, encoding="utf-8") as f:
+            content = f.read()
+        record.update(json.loads(content) if content else {'error': "工作进程没有写出结果"})
+    except subprocess.TimeoutExpired:
+        record['error'] = f"超时（{args.timeout} 秒）"
+    except json.JSONDecodeError as e:
+        record['error'] = f"结果文件无法解析: {e}"
+    except OSError as e:  # 包括 --blender 路径不存在
+        record['error'] = f"无法启动或读取工作进程: {e}"
+    finally:
+        os.remove(result_path)
+    record['file'] = path
+    record['wall_seconds'] = time.perf_counter() - start
+    return record
+
+
+def run_dispatcher(args):
+    if not args.input or not args.output:
+        raise SystemExit("需要指定 --input 与 --output")
+    parse_steps(args.steps)  # 提前校验步骤序列
+    files = list(find_blend_files(args.input))
+    print(f"共 {len(files)} 个文件，{args.workers} 个 Blender 进程")
+    failed = 0
+    with open(args.log, "a", encoding="utf-8") as log, ThreadPoolExecutor(max_workers=args.workers) as pool:
+        futures = [pool.submit(process_file, args, path) for path in files]
+        for future in as_completed(futures):
+            record = future.result()
+            log.write(json.dumps(record, ensure_ascii=False) + "\n")
+            log.flush()
+            ok = record.get('returncode') == 0 and 'error' not in record
+            failed += not ok
+            print(f"[{'OK' if ok else 'FAIL'}] {record['file']} {record['wall_seconds']:.1f}s")
+    print(f"完成：{len(files) - failed} 成功，{failed} 失败，日志写入 {args.log}")
+
+
+def main():
+    args = parse_args()
+    if args.worker:
+        run_worker(args)
+    else:
+        run_dispatcher(args)
+
+
+if __name__ == "__main__":
+    main()
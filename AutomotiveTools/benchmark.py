@@ -0,0 +1,273 @@
+"""Automotive Tools 性能基准套件（后台 Blender 运行）
+
+用法：
+    blender -b --factory-startup --python AutomotiveTools/benchmark.py -- \
+        --parts 1000,10000 --output bench.json --baseline bench_baseline.json
+
+为每个规模生成合成的汽车场景（Part_Sub_NN 命名的部件、带后缀的重复材质、
+多插槽网格、深层空物体层级），对 AutomotiveTools.classes 中的每个操作符计时，
+结果以 JSON 输出，并可与保存的基线逐项对比。
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import bpy
+import bmesh
+import numpy as np
+
+# 允许直接从源码目录运行，无需先安装插件
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import AutomotiveTools
+
+
+def parse_args():
+    argv = sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else []
+    parser = argparse.ArgumentParser(description="Automotive Tools 基准测试")
+    parser.add_argument("--parts", default="1000", help="逗号分隔的部件数量规模，例如 1000,10000,100000")
+    parser.add_argument("--segments", type=int, default=16, help="每个部件的经线分段数")
+    parser.add_argument("--materials", type=int, default=8, help="基础材质数量")
+    parser.add_argument("--duplicates", type=int, default=64, help="带 .001 后缀的重复材质数量")
+    parser.add_argument("--group-size", type=int, default=10, help="每个 Part_Sub 分组的部件数")
+    parser.add_argument("--depth", type=int, default=8, help="每个分组的空物体层级深度")
+    parser.add_argument("--cases", default="", help="只运行名称包含这些关键字的用例（逗号分隔）")
+    parser.add_argument("--output", default="", help="结果 JSON 路径（为空则仅打印）")
+    parser.add_argument("--baseline", default="", help="用于对比的基线 JSON")
+    parser.add_argument("--threshold", type=float, default=1.2, help="耗时超过基线该倍数时标记为退化")
+    return parser.parse_args(argv)
+
+
+# ---------------------- 场景生成 ----------------------
+def clear_scene():
+    """删除场景中所有物体、网格、材质和集合"""
+    if bpy.context.mode != 'OBJECT':
+        bpy.ops.object.mode_set(mode='OBJECT')
+    bpy.data.batch_remove(list(bpy.data.objects))
+    bpy.data.batch_remove(list(bpy.data.meshes))
+    bpy.data.batch_remove(list(bpy.data.materials))
+    bpy.data.batch_remove(list(bpy.data.collections))
+
+
+def make_template_mesh(segments):
+    """创建一个 UV 球作为部件模板网格"""
+    me = bpy.data.meshes.new("Template")
+    bm = bmesh.new()
+    bmesh.ops.create_uvsphere(bm, u_segments=segments, v_segments=max(segments // 2, 3), radius=0.4)
+    bm.to_mesh(me)
+    bm.free()
+    me.uv_layers.new(name="UVMap")
+    return me
+
+
+def make_materials(base_count, duplicate_count):
+    """生成基础材质及其 .001/.002... 后缀的重复材质"""
+    base = [bpy.data.materials.new(f"Paint_{i:03d}") for i in range(base_count)]
+    duplicates = [bpy.data.materials.new(f"{base[i % base_count].name}.{i // base_count + 1:03d}")
+                  for i in range(duplicate_count)]
+    return base + duplicates
+
+
+def make_parts(count, segments, materials, group_size=10, depth=0):
+    """生成 count 个独立网格部件（Part_Sub_NN 命名），返回物体列表
+
+    每 3 个部件中有一个为双插槽网格，每 5 个有一个多余的未使用插槽，
+    每 7 个带自定义法线，每 11 个为非常规缩放；每个部件带一个已用和一个空顶点组。
+    depth > 0 时每个分组挂在一条 depth 层的空物体链下。
+    """
+    template = make_template_mesh(segments)
+    face_count = len(template.polygons)
+    scene_collection = bpy.context.scene.collection
+    side = max(int(count ** 0.5), 1)
+    objects = []
+    leaf = None
+    for i in range(count):
+        group, index = divmod(i, group_size)
+        if depth and index == 0:
+            leaf = None
+            for level in range(depth):
+                empty = bpy.data.objects.new(f"Asm_{group:04d}_L{level:02d}", None)
+                empty.parent = leaf
+                scene_collection.objects.link(empty)
+                leaf = empty
+        me = template.copy()
+        me.materials.append(materials[i % len(materials)])
+        if i % 3 == 0:
+            me.materials.append(materials[(i + 1) % len(materials)])
+            material_index = (np.arange(face_count) % 2).astype(np.int32)
+            me.polygons.foreach_set("material_index", material_index)
+        if i % 5 == 0:
+            me.materials.append(materials[(i + 2) % len(materials)])
+        if i % 7 == 0:
+            normals = np.empty(len(me.loops) * 3, dtype=np.float32)
+            me.corner_normals.foreach_get("vector", normals)
+            me.normals_split_custom_set(normals.reshape(-1, 3))
+        obj = bpy.data.objects.new(f"Body_{group:04d}_{index:02d}", me)
+        obj.location = (i % side, i // side, 0.0)
+        if i % 11 == 0:
+            obj.scale = (1.5, 1.5, 1.5)
+        obj.parent = leaf
+        scene_collection.objects.link(obj)
+        obj.vertex_groups.new(name="Used").add(range(len(me.vertices)), 1.0, 'REPLACE')
+        obj.vertex_groups.new(name="Empty")
+        objects.append(obj)
+    bpy.data.meshes.remove(template)
+    return objects
+
+
+def build_scene(args, parts):
+    clear_scene()
+    materials = make_materials(args.materials, args.duplicates)
+    return make_parts(parts, args.segments, materials, args.group_size, args.depth)
+
+
+def select_only(objects):
+    view_layer = bpy.context.view_layer
+    for obj in view_layer.objects:
+        obj.select_set(False)
+    for obj in objects:
+        obj.select_set(True)
+    view_layer.objects.active = objects[0] if objects else None
+
+
+# ---------------------- 用例准备 ----------------------
+def prepare_default(objects):
+    select_only(objects)
+
+
+def prepare_vertex_group_selection(objects, part_mode='GROUPS'):
+    """合并所有部件后进入编辑模式，选中第一个部件的一个顶点"""
+    select_only(objects)
+    bpy.ops.object.join_with_pregroups(part_mode=part_mode)
+    me = bpy.context.active_object.data
+    select = np.zeros(len(me.vertices), dtype=bool)
+    select[0] = True
+    me.vertices.foreach_set("select", select)
+    bpy.context.tool_settings.mesh_select_mode = (True, False, False)
+    bpy.ops.object.mode_set(mode='EDIT')
+
+
+def prepare_part_selection(objects):
+    prepare_vertex_group_selection(objects, part_mode='ATTRIBUTE')
+
+
+def prepare_audit_selection(objects):
+    select_only(objects)
+    bpy.ops.object.audit_scene()
+
+
+def prepare_content_merge(objects):
+    select_only(objects)
+    bpy.context.scene.merge_mat_mode = 'CONTENT'
+
+
+def prepare_suffix_merge(objects):
+    select_only(objects)
+    bpy.context.scene.merge_mat_mode = 'SUFFIX'
+
+
+def prepare_triangulated(objects):
+    select_only(objects)
+    bpy.ops.object.triangulate_objects()
+
+
+def prepare_grouped(objects):
+    """先执行一次自动编组，计时的是无需移动物体时的重复执行"""
+    select_only(objects)
+    bpy.ops.object.auto_group_objects()
+
+
+# 用例名 -> (操作符 idname, 操作符参数, 准备函数)；未列出的操作符使用默认用例
+CASES = {
+    'join_with_pregroups[BULK]': ("object.join_with_pregroups", {'method': 'BULK'}, prepare_default),
+    'join_with_pregroups[OPERATOR]': ("object.join_with_pregroups", {'method': 'OPERATOR'}, prepare_default),
+    'join_with_pregroups[ATTRIBUTE]': ("object.join_with_pregroups", {'part_mode': 'ATTRIBUTE'}, prepare_default),
+    'select_vertex_group_elements': ("object.select_vertex_group_elements", {}, prepare_vertex_group_selection),
+    'part_elements[SELECT]': ("object.part_elements", {'action': 'SELECT'}, prepare_part_selection),
+    'part_elements[SEPARATE]': ("object.part_elements", {'action': 'SEPARATE'}, prepare_part_selection),
+    'select_audit_category': ("object.select_audit_category", {'category': 'NON_UNIT_SCALE'}, prepare_audit_selection),
+    'triangulate_objects[MODIFIER]': ("object.triangulate_objects", {'mode': 'MODIFIER'}, prepare_default),
+    'triangulate_objects[APPLY]': ("object.triangulate_objects", {'mode': 'APPLY'}, prepare_default),
+    'remove_triangulate': ("object.remove_triangulate", {}, prepare_triangulated),
+    'auto_group_objects': ("object.auto_group_objects", {}, prepare_default),
+    'auto_group_objects[repeat]': ("object.auto_group_objects", {}, prepare_grouped),
+    'cleanup_pipeline[all]': ("object.cleanup_pipeline",
+                              {'custom_normals': True, 'triangulate': True}, prepare_triangulated),
+    'merge_duplicate_materials[SUFFIX]': ("object.merge_duplicate_materials", {}, prepare_suffix_merge),
+    'merge_duplicate_materials[CONTENT]': ("object.merge_duplicate_materials", {}, prepare_content_merge),
+}
+
+
+def all_cases():
+    """显式用例加上 classes 中其余每个操作符的默认用例（性能分析与批处理会话操作符除外）"""
+    cases = dict(CASES)
+    covered = {idname for idname, _, _ in CASES.values()}
+    for cls in AutomotiveTools.classes:
+        if cls in AutomotiveTools.PROFILE_OPERATORS:
+            continue
+        if issubclass(cls, bpy.types.Operator) and cls.bl_idname not in covered:
+            cases[cls.bl_idname.split(".", 1)[1]] = (cls.bl_idname, {}, prepare_default)
+    return cases
+
+
+def run_case(args, parts, idname, props, prepare):
+    objects = build_scene(args, parts)
+    prepare(objects)
+    category, name = idname.split(".")
+    operator = getattr(getattr(bpy.ops, category), name)
+    start = time.perf_counter()
+    try:
+        result = sorted(operator(**props))
+    except Exception as e:
+        result = ['ERROR', str(e)]
+    return {'seconds': time.perf_counter() - start, 'result': result}
+
+
+# ---------------------- 基线对比 ----------------------
+def compare(results, baseline, threshold):
+    """逐项对比当前结果与基线，返回 {规模: {用例: 比值}} 并打印退化项"""
+    ratios = {}
+    for scale, cases in results['scales'].items():
+        base_cases = baseline.get('scales', {}).get(scale, {})
+        for case, entry in cases.items():
+            base = base_cases.get(case)
+            if not base:
+                continue
+            ratio = entry['seconds'] / max(base['seconds'], 1e-9)
+            ratios.setdefault(scale, {})[case] = ratio
+            if ratio > threshold:
+                print(f"[退化] {scale} 部件 {case}: {base['seconds']:.3f}s -> {entry['seconds']:.3f}s (x{ratio:.2f})")
+    return ratios
+
+
+def main():
+    args = parse_args()
+    scales = [int(value) for value in args.parts.split(",") if value.strip()]
+    filters = [value.strip() for value in args.cases.split(",") if value.strip()]
+    AutomotiveTools.register()
+    results = {'blender': bpy.app.version_string, 'args': vars(args), 'scales': {}}
+    try:
+        for parts in scales:
+            scale_results = results['scales'][str(parts)] = {}
+            for case, (idname, props, prepare) in all_cases().items():
+                if filters and not any(value in case for value in filters):
+                    continue
+                entry = run_case(args, parts, idname, props, prepare)
+                scale_results[case] = entry
+                print(f"{parts:>7} {case:<40} {entry['seconds']:8.3f}s {entry['result']}")
+    finally:
+        clear_scene()
+        AutomotiveTools.unregister()
+    if args.baseline and os.path.exists(args.baseline):
+        with open(args.baseline, encoding="utf-8") as f:
+            results['baseline_ratio'] = compare(results, json.load(f), args.threshold)
+    text = json.dumps(results, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text)
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()